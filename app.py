@@ -1,21 +1,110 @@
+import os
+import time
+import uuid
+import tempfile
 import streamlit as st
 import pandas as pd
 import io
-from lead_enricher.utils import read_csv_bytes
-from lead_enricher.enrichment import enrich_contacts
+import json
+from lead_enricher.utils import read_csv_bytes, to_output_frame
+from lead_enricher.journal import JobJournal, job_id_for
+from lead_enricher.jobs import JobRunner, RUNNING, QUEUED
+from lead_enricher.author_index import build_index, records_from_cache, reload_author_index, get_author_index
+from lead_enricher.metrics import summarize, snapshot_to_prometheus
 
 st.set_page_config(page_title="lead-enricher-app", layout="wide")
 
 st.title("Lead Enricher App")
 
+
+@st.cache_resource
+def get_journal() -> JobJournal:
+    return JobJournal()
+
+
+@st.cache_resource
+def get_runner() -> JobRunner:
+    # shared by all sessions; jobs keep running across reruns
+    return JobRunner(journal=get_journal())
+
+
+# jobs in the shared runner are scoped to the browser session that submitted them
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+
+
+def rerun():
+    (getattr(st, "rerun", None) or st.experimental_rerun)()
+
+
+def show_results(result_df: pd.DataFrame):
+    lookup_stats = result_df.attrs.get("lookup_stats", {})
+    saved = sum(c["saved"] for c in lookup_stats.values())
+    if saved:
+        st.caption(f"Shared {saved} duplicate lookups across rows")
+
+    # Build privacy-safe output with email hooks when requested
+    # Required output columns (plus minimal contact info retained):
+    # First Name, Last Name, Title, Company, Email, LinkedIn, Website, Hook_Person, Hook_Company, Hook_Final
+    combined = to_output_frame(result_df, generate_hooks)
+
+    st.subheader("Preview enriched results")
+    st.dataframe(combined.head(10))
+
+    if st.checkbox("Show debug info", value=False):
+        debug_cols = ["Debug Name Used", "Debug Author Matched", "Debug Match Score", "Debug Papers Found", "Confidence Score"]
+        dbg = result_df[[c for c in debug_cols if c in result_df.columns]]
+        st.subheader("Debug info (per-row)")
+        st.dataframe(dbg.head(10))
+
+    if generate_hooks:
+        st.subheader("Hook preview (first 10 rows)")
+        st.table(combined["Hook_Final"].head(10))
+
+    csv_bytes = combined.to_csv(index=False).encode("utf-8")
+    st.download_button("Download enriched CSV", data=csv_bytes, file_name="enriched_contacts.csv", mime="text/csv")
+
+
+def show_job_metrics(job, downloads: bool = True):
+    snap = job.metrics()
+    summary = summarize(snap)
+    with st.expander("Job metrics", expanded=False):
+        if summary["stages"]:
+            st.caption("Time per stage")
+            st.dataframe(pd.DataFrame(summary["stages"]))
+        if summary["hosts"]:
+            st.caption("Requests per host")
+            st.dataframe(pd.DataFrame(summary["hosts"]))
+        if summary["cache"]:
+            st.caption("Cache lookups per namespace")
+            st.dataframe(pd.DataFrame(summary["cache"]))
+        if downloads:
+            st.download_button("Download metrics (JSON)", data=json.dumps(snap, indent=2), file_name=f"metrics_{job.job_id}.json", mime="application/json")
+            st.download_button("Download metrics (Prometheus)", data=snapshot_to_prometheus(snap), file_name=f"metrics_{job.job_id}.prom", mime="text/plain")
+
+
 with st.sidebar:
     st.header("Settings")
     num_papers = st.number_input("Number of papers/works to fetch", min_value=1, max_value=20, value=5)
     match_score_threshold = st.slider("Match score threshold", min_value=30, max_value=95, value=65)
-    max_rows = st.number_input("Max rows to process", min_value=1, max_value=500, value=50)
-    per_row_delay = st.number_input("Per-row delay (s) to avoid rate limits", min_value=0.0, max_value=5.0, value=0.5, step=0.1)
+    stream_mode = st.checkbox("Streaming mode (large files)", value=False, help="Read the CSV in chunks and write results to a file as they finish; memory stays flat regardless of file size.")
+    max_rows = st.number_input("Max rows to process", min_value=1, max_value=1_000_000 if stream_mode else 500, value=50)
+    per_row_delay = st.number_input("Per-row delay (s)", min_value=0.0, max_value=5.0, value=0.0, step=0.1, help="Extra pause per row; API quotas are already enforced per host.")
+    openalex_rps = st.number_input("OpenAlex requests/sec", min_value=0.1, max_value=10.0, value=10.0, step=0.5)
+    semanticscholar_rps = st.number_input("Semantic Scholar requests/sec", min_value=0.1, max_value=10.0, value=1.0, step=0.1)
+    concurrency = st.number_input("Concurrent rows", min_value=1, max_value=32, value=8, help="Rows enriched in parallel; the per-row delay applies to each worker.")
+    worker_processes = st.number_input("Worker processes", min_value=0, max_value=16, value=0, disabled=stream_mode, help="0 enriches in this process. More spread the rows over worker processes sharing a queue file; the rate limits are split between them.")
+    search_mode = st.selectbox("Author search", ["sequential", "parallel", "hedged"], help="sequential: Semantic Scholar only when OpenAlex has no good match (fewest requests). parallel: OpenAlex and Semantic Scholar are searched together, OpenAlex preferred. hedged: the first confident match wins. Semantic Scholar is only searched early while its rate limit has room.")
+    refresh = st.checkbox("Incremental refresh", value=False, help="Revalidate cached works and websites older than the age below (conditional requests where the source supports them) and mark each row new, changed or unchanged.")
+    refresh_after_days = st.number_input("Refresh entries older than (days)", min_value=0, max_value=365, value=30, disabled=not refresh)
     safe_mode = st.checkbox("Safe mode (no LinkedIn scraping)", value=True, help="Do not attempt any LinkedIn scraping; LinkedIn URLs are stored only.")
     generate_hooks = st.checkbox("Generate email-ready hooks", value=True)
+    use_author_index = st.checkbox("Use local author index", value=True, help="Match names against the offline author index first; the APIs are only searched below the match threshold.")
+    author_index = get_author_index()
+    st.caption(f"Author index: {len(author_index)} authors" if author_index is not None else "Author index: not built")
+    if st.button("Rebuild author index from cache"):
+        n = build_index(records_from_cache())
+        reload_author_index()
+        st.success(f"Indexed {n} authors")
 
 st.markdown("Upload an Apollo contacts CSV, run enrichment, preview and download the enriched CSV.")
 
@@ -23,12 +112,18 @@ uploaded = st.file_uploader("Upload CSV", type=["csv"])
 
 if uploaded is not None:
     try:
-        df = read_csv_bytes(uploaded)
+        if stream_mode:
+            # only peek at the head; the full file is streamed on run
+            df = pd.read_csv(uploaded, nrows=5)
+            uploaded.seek(0)
+        else:
+            df = read_csv_bytes(uploaded)
     except Exception as e:
         st.error(f"Failed to read CSV: {e}")
         st.stop()
 
-    st.success(f"Loaded {len(df)} rows")
+    if not stream_mode:
+        st.success(f"Loaded {len(df)} rows")
     st.dataframe(df.head(5))
 
     settings = {
@@ -36,70 +131,74 @@ if uploaded is not None:
         "match_score_threshold": int(match_score_threshold),
         "max_rows": int(max_rows),
         "per_row_delay": float(per_row_delay),
+        "concurrency": int(concurrency),
+        "search_mode": search_mode,
+        # a new date is a new job; a rerun the same day resumes it
+        "refresh": time.strftime("%Y-%m-%d") if refresh else None,
+        "refresh_after_days": int(refresh_after_days),
+        "rate_limits": {
+            "api.openalex.org": float(openalex_rps),
+            "api.semanticscholar.org": float(semanticscholar_rps),
+        },
         "safe_mode": bool(safe_mode),
+        "use_author_index": bool(use_author_index),
     }
 
+    # progress is checkpointed per row, so a rerun of the same file resumes
+    journal = get_journal()
+    runner = get_runner()
+    job_id = job_id_for(uploaded.getvalue(), settings)
+    job_status = journal.status(job_id)
+    if job_status and runner.get(job_id, session_id) is None:
+        st.info(
+            f"Saved progress for this file: {job_status['done']} done, {job_status['failed']} failed "
+            f"of {job_status['total']} rows. Running again resumes and retries failed rows."
+        )
+        if st.button("Discard saved progress"):
+            journal.delete(job_id)
+            st.success("Saved progress discarded")
+
     if st.button("Run enrichment"):
-        progress = st.progress(0)
-        status_text = st.empty()
-        max_items = min(len(df), settings["max_rows"])
-        enriched_rows = []
-        for i in range(max_items):
-            row = df.iloc[i:i+1]
-            # call enrich_contacts on a single-row DataFrame
-            out_df = enrich_contacts(row, settings)
-            enriched_rows.append(out_df.iloc[0].to_dict())
-            progress.progress(int(((i + 1) / max_items) * 100))
-            status_text.text(f"Processed {i+1}/{max_items}")
-
-        result_df = pd.DataFrame(enriched_rows)
-
-        # Build privacy-safe output with email hooks when requested
-        # Required output columns (plus minimal contact info retained):
-        # First Name, Last Name, Title, Company, Email, LinkedIn, Website, Hook_Person, Hook_Company, Hook_Final
-        original = df.reset_index(drop=True).iloc[:len(result_df)].copy()
-
-        def get_orig(col_names, n):
-            for cn in col_names:
-                if cn in original.columns:
-                    return original[cn].values
-            return [None] * n
-
-        n = len(result_df)
-        out = pd.DataFrame()
-        out["First Name"] = get_orig(["First Name", "first_name", "firstName"], n)
-        out["Last Name"] = get_orig(["Last Name", "last_name", "lastName"], n)
-        out["Title"] = get_orig(["Title", "title"], n)
-        out["Company"] = get_orig(["Company Name", "company", "company_name"], n)
-        out["Email"] = get_orig(["Email", "email"], n)
-        # LinkedIn: prefer person linkedin url
-        out["LinkedIn"] = get_orig(["Person Linkedin Url", "person_linkedin", "linkedin", "Person Linkedin"], n)
-        out["Website"] = get_orig(["Website", "website"], n)
-
-        # Hooks from enrichment output
-        if generate_hooks:
-            out["Hook_Person"] = result_df.get("Hook_Person", [""] * n).values
-            out["Hook_Company"] = result_df.get("Hook_Company", [""] * n).values
-            out["Hook_Final"] = result_df.get("Hook_Final", [""] * n).values
+        if stream_mode:
+            out_path = os.path.join(tempfile.gettempdir(), f"enriched_{uuid.uuid4().hex}.csv")
+            # hand the job its own copy; the widget's buffer is reused by reruns
+            source = io.BytesIO(uploaded.getvalue())
+            job = runner.submit_csv(job_id, source, out_path, settings, transform=lambda frame, hooks=generate_hooks: to_output_frame(frame, hooks), owner=session_id)
+        elif worker_processes:
+            job = runner.submit_queued(job_id, df, settings, workers=int(worker_processes), owner=session_id)
         else:
-            out["Hook_Person"] = [""] * n
-            out["Hook_Company"] = [""] * n
-            out["Hook_Final"] = [""] * n
-
-        combined = out
-
-        st.subheader("Preview enriched results")
-        st.dataframe(combined.head(10))
-
-        if st.checkbox("Show debug info", value=False):
-            debug_cols = ["Debug Name Used", "Debug Author Matched", "Debug Match Score", "Debug Papers Found", "Confidence Score"]
-            dbg = result_df[[c for c in debug_cols if c in result_df.columns]]
-            st.subheader("Debug info (per-row)")
-            st.dataframe(dbg.head(10))
-
-        if generate_hooks:
-            st.subheader("Hook preview (first 10 rows)")
-            st.table(combined["Hook_Final"].head(10))
-
-        csv_bytes = combined.to_csv(index=False).encode("utf-8")
-        st.download_button("Download enriched CSV", data=csv_bytes, file_name="enriched_contacts.csv", mime="text/csv")
+            job = runner.submit(job_id, df, settings, owner=session_id)
+        st.session_state["job_id"] = job.job_id
+
+# the job runs in the background; this section polls it on every rerun
+job = get_runner().get(st.session_state.get("job_id", ""), session_id)
+if job is not None:
+    st.subheader("Enrichment job")
+    st.progress(int(job.progress() * 100))
+    total = f"/{job.total}" if job.total else ""
+    st.text(f"Status: {job.status} | Processed {job.done}{total}")
+    if job.error:
+        st.error(f"Job failed: {job.error}")
+
+    if job.status in (RUNNING, QUEUED):
+        if st.button("Cancel job"):
+            job.cancel()
+        if job.output_path is None and job.done and st.checkbox("Show partial results", value=False):
+            st.dataframe(to_output_frame(job.results(), generate_hooks).head(10))
+        show_job_metrics(job, downloads=False)
+        time.sleep(1)
+        rerun()
+    else:
+        if job.output_path:
+            if os.path.exists(job.output_path):
+                st.subheader("Preview enriched results")
+                st.dataframe(pd.read_csv(job.output_path, nrows=10))
+                with open(job.output_path, "rb") as f:
+                    st.download_button("Download enriched CSV", data=f, file_name="enriched_contacts.csv", mime="text/csv")
+        elif job.done:
+            show_results(job.results())
+        show_job_metrics(job)
+        if st.button("Clear job"):
+            get_runner().discard(job.job_id, session_id)
+            del st.session_state["job_id"]
+            rerun()
@@ -0,0 +1,227 @@
+"""Throughput benchmark for ``enrich_contacts`` against local mock servers.
+
+Runs each scenario cold (empty cache) and warm (same cache file, fresh
+process-level memory tier) and reports rows/sec, per-row latency
+percentiles (time inside ``enrich_row``; the batch prefetch stage is only
+in the wall-clock rows/sec), request counts and cache hit ratios. Results are written to
+``benchmarks/results/`` as JSON so versions can be compared::
+
+    python -m benchmarks.bench_enrichment --rows 200 1000 --concurrency 1 8 16
+    python -m benchmarks.bench_enrichment --baseline benchmarks/results/<file>.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import itertools
+import subprocess
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from lead_enricher import cache_utils, enrichment
+from lead_enricher.apis import OpenAlexClient, SemanticScholarClient
+from lead_enricher.metrics import summarize
+from lead_enricher.rate_limit import limiter
+
+from .mock_servers import MockConfig, MockServer
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+FIRST = ["Jane", "John", "Maria", "Wei", "Aisha", "Lukas", "Sofia", "Ravi", "Elena", "Kenji", "Olga", "Pedro", "Fatima", "Noah", "Chloé"]
+LAST = ["Doe", "Smith", "García", "Chen", "Khan", "Müller", "Rossi", "Patel", "Ivanova", "Tanaka", "Silva", "Nguyen", "Haddad", "Brown", "Dubois"]
+
+
+def make_contacts(n: int, mock: MockServer, unique_ratio: float = 0.7, companies: int = 50, seed: int = 0) -> pd.DataFrame:
+    """Synthetic Apollo export with repeated people and shared company websites."""
+    rng = random.Random(seed)
+    people = []
+    for i in range(max(1, int(n * unique_ratio))):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        company = rng.randrange(companies)
+        people.append((first, f"{last}{i}", company))
+    rows = []
+    for i in range(n):
+        first, last, company = people[i] if i < len(people) else rng.choice(people)
+        rows.append({
+            "First Name": first,
+            "Last Name": last,
+            "Title": "Scientist",
+            "Company Name": f"Company {company}",
+            "Email": f"{first}.{last}@company{company}.example".lower(),
+            "Website": mock.website_url(company),
+            "Person Linkedin Url": "",
+        })
+    return pd.DataFrame(rows)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50) * 1000, 2), "p95": round(float(p95) * 1000, 2), "p99": round(float(p99) * 1000, 2)}
+
+
+def _hit_ratios(stats: Dict[str, Dict[str, int]]) -> Dict[str, float]:
+    out = {}
+    for ns, c in stats.items():
+        total = c["memory_hits"] + c["disk_hits"] + c["misses"]
+        out[ns] = round((c["memory_hits"] + c["disk_hits"]) / total, 3) if total else 0.0
+    return out
+
+
+def run_once(df: pd.DataFrame, settings: Dict, mock: MockServer) -> Dict:
+    latencies = []
+    enrich_row = enrichment._enrich_row
+
+    def timed_enrich_row(*args, **kwargs):
+        t = time.perf_counter()
+        try:
+            return enrich_row(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - t)
+
+    mock.reset_counts()
+    cache_utils.cache_stats(reset=True)
+    enrichment._enrich_row = timed_enrich_row
+    try:
+        start = time.perf_counter()
+        out = enrichment.enrich_contacts(df, settings)
+        elapsed = time.perf_counter() - start
+    finally:
+        enrichment._enrich_row = enrich_row
+    counts = dict(mock.counts)
+    return {
+        "rows": len(out),
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(len(out) / elapsed, 2) if elapsed else 0.0,
+        "row_latency_ms": _percentiles(latencies),
+        "requests": sum(v for k, v in counts.items() if k != "429"),
+        "requests_by_route": counts,
+        "bytes_downloaded": mock.bytes_sent,
+        "cache_hit_ratio": _hit_ratios(cache_utils.cache_stats()),
+        "lookups_shared": out.attrs.get("lookup_stats", {}),
+        "stages": summarize(out.attrs.get("metrics", {}))["stages"],
+    }
+
+
+def run_scenario(rows: int, concurrency: int, per_row_delay: float, batch_size: int, config: MockConfig, websites: int, rps: float) -> Dict:
+    mock = MockServer(config, websites=websites).start()
+    OpenAlexClient.BASE = mock.base_url
+    SemanticScholarClient.BASE = mock.base_url
+    limiter.configure({host: rps for host in mock.hosts()})
+    df = make_contacts(rows, mock, seed=config.seed)
+    settings = {
+        "num_papers": 5,
+        "match_score_threshold": 65,
+        "max_rows": rows,
+        "per_row_delay": per_row_delay,
+        "concurrency": concurrency,
+        "lookup_batch_size": batch_size,
+        "use_author_index": False,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_utils.configure_cache(os.path.join(tmp, "cache.sqlite3"))
+        try:
+            cold = run_once(df, settings, mock)
+            # warm: same cache file, empty in-memory tier as in a new process
+            cache_utils.disk_cache_flush()
+            cache_utils.configure_cache(os.path.join(tmp, "cache.sqlite3"))
+            warm = run_once(df, settings, mock)
+        finally:
+            cache_utils.configure_cache()
+            mock.stop()
+    return {
+        "rows": rows,
+        "concurrency": concurrency,
+        "per_row_delay": per_row_delay,
+        "lookup_batch_size": batch_size,
+        "cold": cold,
+        "warm": warm,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _scenario_key(s: Dict) -> tuple:
+    return (s["rows"], s["concurrency"], s["per_row_delay"], s["lookup_batch_size"])
+
+
+def print_report(results: Dict, baseline: Optional[Dict] = None):
+    base = {_scenario_key(s): s for s in (baseline or {}).get("scenarios", [])}
+    header = f"{'rows':>6} {'conc':>4} {'delay':>5} {'batch':>5} | {'mode':<4} {'rows/s':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'reqs':>6}"
+    print(header + ("  vs baseline" if base else ""))
+    print("-" * len(header))
+    for s in results["scenarios"]:
+        for mode in ("cold", "warm"):
+            r = s[mode]
+            lat = r["row_latency_ms"]
+            line = (f"{s['rows']:>6} {s['concurrency']:>4} {s['per_row_delay']:>5} {s['lookup_batch_size']:>5} | {mode:<4} "
+                    f"{r['rows_per_sec']:>8} {lat['p50']:>8} {lat['p95']:>8} {lat['p99']:>8} {r['requests']:>6}")
+            prev = base.get(_scenario_key(s))
+            if prev and prev[mode]["rows_per_sec"]:
+                change = (r["rows_per_sec"] / prev[mode]["rows_per_sec"] - 1) * 100
+                line += f"  {change:+.1f}% rows/s"
+            print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_enrichment")
+    parser.add_argument("--rows", type=int, nargs="+", default=[200])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--per-row-delay", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[enrichment.DEFAULT_LOOKUP_BATCH_SIZE])
+    parser.add_argument("--latency", type=float, default=0.05, help="mock response latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--works-skew", type=float, default=0.0, help="spread of works counts and citations between authors")
+    parser.add_argument("--padding-bytes", type=int, default=2000, help="filler per author/work object")
+    parser.add_argument("--page-bytes", type=int, default=50_000, help="homepage size")
+    parser.add_argument("--websites", type=int, default=10, help="distinct homepage servers")
+    parser.add_argument("--rps", type=float, default=1000.0, help="rate limit per mock host")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=RESULTS_DIR, help="directory for the results JSON")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(latency=args.latency, jitter=args.jitter, rate_limit_ratio=args.rate_limit_ratio,
+                        works_skew=args.works_skew, padding_bytes=args.padding_bytes, page_bytes=args.page_bytes, seed=args.seed)
+    scenarios = []
+    for rows, conc, delay, batch in itertools.product(args.rows, args.concurrency, args.per_row_delay, args.batch_size):
+        print(f"running rows={rows} concurrency={conc} delay={delay} batch={batch} ...", file=sys.stderr)
+        scenarios.append(run_scenario(rows, conc, delay, batch, config, args.websites, args.rps))
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock": config.as_dict(),
+        "scenarios": scenarios,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{time.strftime('%Y%m%d-%H%M%S')}-{results['git_revision'] or 'nogit'}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    print(f"\nsaved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
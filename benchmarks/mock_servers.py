@@ -0,0 +1,266 @@
+"""Local stand-ins for OpenAlex, Semantic Scholar and company homepages.
+
+Responses are deterministic for a given seed and request, so runs are
+comparable. Latency, 429 injection and payload sizes are configurable.
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class MockConfig:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, rate_limit_ratio: float = 0.0, retry_after: float = 0.2,
+                 candidates: int = 5, works_per_author: int = 20, works_skew: float = 0.0, padding_bytes: int = 2000,
+                 page_bytes: int = 50_000, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        # share of requests answered with 429 + Retry-After
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.candidates = candidates
+        self.works_per_author = works_per_author
+        # 0 gives every author works_per_author works with similar citations;
+        # higher values spread works counts (up to works_per_author * (1 + skew))
+        # and citation levels (over a 10**skew range) between authors
+        self.works_skew = works_skew
+        # filler added to every author/work object (stands in for abstracts, concept trees...)
+        self.padding_bytes = padding_bytes
+        # size of each homepage body; the summary is in <head>
+        self.page_bytes = page_bytes
+        self.seed = seed
+
+    def as_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+def _stable(*parts) -> int:
+    return zlib.crc32("|".join(str(p) for p in parts).encode("utf-8"))
+
+
+def _select(objs: List[Dict], fields: Optional[str]) -> List[Dict]:
+    # OpenAlex ``select=`` / Semantic Scholar ``fields=`` (top-level fields only)
+    if not fields:
+        return objs
+    keep = [f for f in fields.split(",") if "." not in f]
+    return [{k: o[k] for k in keep if k in o} for o in objs]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockAPI/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (ConnectionResetError, BrokenPipeError):
+            # the client hung up, e.g. after reading a homepage's <head>
+            pass
+
+    @property
+    def mock(self) -> "MockServer":
+        return self.server.mock
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json", headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        self.mock.record_bytes(len(body))
+
+    def _delay_or_throttle(self, route: str) -> bool:
+        cfg = self.mock.config
+        self.mock.record(route)
+        if cfg.latency or cfg.jitter:
+            time.sleep(max(0.0, cfg.latency + random.uniform(-cfg.jitter, cfg.jitter)))
+        if cfg.rate_limit_ratio and random.random() < cfg.rate_limit_ratio:
+            self.mock.record("429")
+            self._send(429, b"{}", headers={"Retry-After": f"{cfg.retry_after:g}"})
+            return True
+        return False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        route = self.mock.route(url.path)
+        if self._delay_or_throttle(route):
+            return
+        if route == "website":
+            body, ctype = self.mock.homepage(self.server.server_address[1]), "text/html; charset=utf-8"
+        elif route == "/authors":
+            name = query.get("filter", "").split(":", 1)[-1]
+            authors = _select(self.mock.openalex_authors(name), query.get("select"))
+            body, ctype = json.dumps({"results": authors}).encode(), "application/json"
+        elif route == "/works":
+            ids = query.get("filter", "").split(":", 1)[-1].split("|")
+            per_page = int(query.get("per-page", 25))
+            works = self.mock.openalex_works(ids)
+            body = json.dumps({"meta": {"count": len(works)}, "results": _select(works[:per_page], query.get("select"))}).encode()
+            ctype = "application/json"
+        elif route == "/author/search":
+            authors = _select(self.mock.s2_authors(query.get("query", "")), query.get("fields"))
+            body, ctype = json.dumps({"data": authors}).encode(), "application/json"
+        elif route == "/author/{id}/papers":
+            author_id = unquote(url.path.split("/")[-2])
+            limit = int(query.get("limit", 100))
+            papers = _select(self.mock.s2_papers(author_id)[:limit], query.get("fields"))
+            body, ctype = json.dumps({"data": papers}).encode(), "application/json"
+        else:
+            self._send(404, b"{}")
+            return
+        self._send(200, body, ctype)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        route = self.mock.route(url.path)
+        if self._delay_or_throttle(route):
+            return
+        if route != "/author/batch":
+            self._send(404, b"{}")
+            return
+        out = [{"authorId": i, "name": f"Author {i}", "papers": self.mock.s2_papers(i)} for i in payload.get("ids", [])]
+        self._send(200, json.dumps(out).encode())
+
+
+class MockServer:
+    """One mock API server plus ``websites`` homepage servers on their own ports."""
+
+    def __init__(self, config: Optional[MockConfig] = None, websites: int = 10):
+        self.config = config or MockConfig()
+        self.counts: Counter = Counter()
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._servers: List[ThreadingHTTPServer] = []
+        self._website_ports: List[int] = []
+        self._n_websites = websites
+        self.api = None
+
+    def start(self) -> "MockServer":
+        random.seed(self.config.seed)
+        self.api = self._serve()
+        self._website_ports = [self._serve().server_address[1] for _ in range(self._n_websites)]
+        return self
+
+    def _serve(self) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        server.daemon_threads = True
+        server.mock = self
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self._servers.append(server)
+        return server
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.api.server_address[1]}"
+
+    def hosts(self) -> List[str]:
+        return [f"127.0.0.1:{s.server_address[1]}" for s in self._servers]
+
+    def website_url(self, company_no: int) -> str:
+        return f"http://127.0.0.1:{self._website_ports[company_no % len(self._website_ports)]}/"
+
+    def route(self, path: str) -> str:
+        if path.startswith("/author/") and path.endswith("/papers"):
+            return "/author/{id}/papers"
+        if path in ("/authors", "/works", "/author/search", "/author/batch"):
+            return path
+        return "website"
+
+    def record(self, route: str):
+        with self._lock:
+            self.counts[route] += 1
+
+    def record_bytes(self, n: int):
+        with self._lock:
+            self.bytes_sent += n
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts.clear()
+            self.bytes_sent = 0
+
+    # payloads
+
+    def _padding(self) -> str:
+        return "x" * self.config.padding_bytes
+
+    def openalex_authors(self, name: str) -> List[Dict]:
+        base = _stable(self.config.seed, name.casefold())
+        out = []
+        for k in range(self.config.candidates):
+            # the first candidate is the person, the rest are near misses
+            display = name if k == 0 else f"{name.split(' ')[0]} {chr(65 + k)}. {name.split(' ')[-1]}x"
+            out.append({
+                "id": f"https://openalex.org/A{base % 10**8 + k}",
+                "display_name": display,
+                "x_concepts": [{"display_name": "Immunology", "score": 80.1}, {"display_name": "Biology", "score": 60.2}],
+                "last_known_institutions": [{"display_name": "Example University"}],
+                "works_count": self._works_count(f"A{base % 10**8 + k}"),
+                "counts_by_year": [{"year": 2020 + y, "works_count": y} for y in range(5)],
+                "summary": self._padding(),
+            })
+        return out
+
+    def _works_count(self, short_id: str) -> int:
+        cfg = self.config
+        if not cfg.works_skew:
+            return cfg.works_per_author
+        u = _stable(cfg.seed, "works", short_id) % 1000 / 1000
+        return max(1, round(cfg.works_per_author * (1 + cfg.works_skew) * u))
+
+    def _citation_scale(self, short_id: str) -> float:
+        return 10 ** (self.config.works_skew * (_stable(self.config.seed, "cites", short_id) % 1000 / 1000))
+
+    def openalex_works(self, ids: List[str]) -> List[Dict]:
+        works = []
+        for short_id in ids:
+            scale = self._citation_scale(short_id)
+            for k in range(self._works_count(short_id)):
+                works.append({
+                    "id": f"https://openalex.org/W{_stable(short_id, k) % 10**9}",
+                    "title": f"Antibody engineering study {k} ({short_id})",
+                    "publication_year": 2024 - k % 10,
+                    "cited_by_count": max(0, int(scale * (1000 - k * 10)) - _stable(short_id) % 7),
+                    "concepts": [{"display_name": "Antibody", "score": 0.9}, {"display_name": "Immunology", "score": 0.7}],
+                    "authorships": [{"author": {"id": f"https://openalex.org/{short_id}", "display_name": "x"}}],
+                    "abstract_inverted_index": {"padding": [self._padding()]},
+                })
+        works.sort(key=lambda w: -w["cited_by_count"])
+        return works
+
+    def s2_authors(self, name: str) -> List[Dict]:
+        base = _stable("s2", self.config.seed, name.casefold())
+        return [{"authorId": str(base % 10**7 + k), "name": name if k == 0 else f"{name}son"} for k in range(self.config.candidates)]
+
+    def s2_papers(self, author_id: str) -> List[Dict]:
+        return [
+            {"paperId": f"p{author_id}{k}", "title": f"Paper {k} by {author_id}", "year": 2023 - k, "externalIds": {}, "fieldsOfStudy": ["Biology"]}
+            for k in range(self.config.works_per_author)
+        ]
+
+    def homepage(self, port: int) -> bytes:
+        head = (
+            f"<html><head><title>Company {port}</title>"
+            f'<meta name="description" content="Company {port} builds antibody discovery platforms">'
+            "</head><body><h1>Welcome</h1>"
+        )
+        filler = "<p>" + "lorem ipsum " * max(0, (self.config.page_bytes - len(head)) // 12) + "</p>"
+        return (head + filler + "</body></html>").encode("utf-8")
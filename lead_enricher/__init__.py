@@ -1,11 +1,13 @@
 from .apis import OpenAlexClient, SemanticScholarClient
-from .enrichment import enrich_contacts
-from .scoring import name_match_score, confidence_label
+from .enrichment import enrich_contacts, iter_enrich_rows
+from .scoring import name_match_score, best_matches, confidence_label
 
 __all__ = [
     "OpenAlexClient",
     "SemanticScholarClient",
     "enrich_contacts",
+    "iter_enrich_rows",
     "name_match_score",
+    "best_matches",
     "confidence_label",
 ]
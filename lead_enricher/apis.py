@@ -1,110 +1,437 @@
 import time
+import socket
 import requests
-from typing import Optional, List, Dict
-from .cache_utils import disk_cache_get, disk_cache_set
+from typing import Callable, Optional, List, Dict
+from .cache_utils import disk_cache_get, disk_cache_get_entry, disk_cache_set, LOOKUP_FAILED, FAILURE_TTL, EMPTY_TTL, DAY
+from .rate_limit import limiter, parse_retry_after, backoff_delay, host_of
+from .sessions import sessions
+from .metrics import metrics
+from .cache_keys import author_search_key, works_key, openalex_short_id as _short_id
 
 DEFAULT_HEADERS = {"User-Agent": "lead-enricher/1.0"}
+RETRY_STATUSES = (429, 503)
+# works/papers are fetched and cached at this size and sliced per request,
+# so any num_papers up to it shares one cache entry
+WORKS_LIMIT = 20
+# citation order drifts even when nothing new is published, so a works list
+# only revalidated by a publication-date probe is refetched at this age
+WORKS_REFETCH_AGE = 90 * DAY
 
-def request_with_retries(url: str, params: dict = None, headers: dict = None, retries: int = 3, backoff: float = 1.0, timeout: int = 10):
-    headers = {**DEFAULT_HEADERS, **(headers or {})}
-    attempt = 0
-    while attempt < retries:
-        try:
-            resp = requests.get(url, params=params, headers=headers, timeout=timeout)
-            if resp.status_code == 429:
-                # rate limited
-                time.sleep(backoff * (attempt + 1))
-                attempt += 1
-                continue
-            resp.raise_for_status()
-            return resp.json()
-        except requests.RequestException:
-            time.sleep(backoff * (attempt + 1))
-            attempt += 1
-    return None
 
+def metric_host(url: str) -> str:
+    # API hosts by name; company websites share one label so the number of
+    # metric series stays bounded
+    host = host_of(url)
+    return host if host in limiter.rates else "website"
 
-def request_html_with_retries(url: str, headers: dict = None, retries: int = 3, backoff: float = 1.0, timeout: int = 10):
+
+def wire_bytes(resp: requests.Response, default: int = 0) -> int:
+    """Bytes of the body received so far, before content decoding (gzip)."""
+    try:
+        return int(resp.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+
+def _definitive(exc: BaseException) -> bool:
+    # retrying can't help: a 4xx other than 429, an unknown host or a refused connection
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return 400 <= exc.response.status_code < 500
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, (ConnectionRefusedError, socket.gaierror)):
+            return True
+        # requests wraps urllib3's MaxRetryError, whose ``reason`` holds the socket error
+        reason = getattr(exc, "reason", None)
+        if isinstance(reason, BaseException):
+            exc = reason
+        else:
+            exc = exc.__cause__ or exc.__context__ or next((a for a in exc.args if isinstance(a, BaseException)), None)
+    return False
+
+
+def send_with_retries(method: str, url: str, params: dict = None, headers: dict = None, retries: int = 3, backoff: float = 1.0, timeout=None, session: requests.Session = None, raise_definitive: bool = False, **kwargs) -> Optional[requests.Response]:
+    """Send a request through the shared per-host rate limiter; returns the response or None.
+
+    Uses the pooled keep-alive session for the host unless ``session`` is given.
+    ``timeout`` defaults to the host's (connect, read) timeouts. A definitive
+    failure (4xx, unknown host, refused connection) is not retried; with
+    ``raise_definitive`` its ``requests`` exception is raised instead of
+    returning None.
+    """
     headers = {**DEFAULT_HEADERS, **(headers or {})}
+    session = session or sessions.session_for(url)
+    timeout = timeout or sessions.timeout_for(url)
+    host = metric_host(url)
     attempt = 0
     while attempt < retries:
+        if attempt:
+            metrics.inc("http_retries_total", host=host)
+        with metrics.timer("rate_limit_wait_seconds", host=host):
+            limiter.acquire(url)
         try:
-            resp = requests.get(url, headers=headers, timeout=timeout)
-            if resp.status_code == 429:
-                time.sleep(backoff * (attempt + 1))
+            with metrics.timer("http_request_seconds", host=host):
+                resp = session.request(method, url, params=params, headers=headers, timeout=timeout, **kwargs)
+            metrics.inc("http_requests_total", host=host, status=resp.status_code)
+            if resp.status_code in RETRY_STATUSES:
+                # rate limited: pause the host for every worker, not just this one
+                metrics.inc("http_rate_limited_total", host=host)
+                delay = parse_retry_after(resp.headers.get("Retry-After"))
+                if delay is None:
+                    delay = backoff_delay(attempt, backoff)
+                limiter.on_rate_limited(url, delay)
+                resp.close()
                 attempt += 1
                 continue
             resp.raise_for_status()
-            return resp.text
-        except requests.RequestException:
-            time.sleep(backoff * (attempt + 1))
+            limiter.on_success(url)
+            if not kwargs.get("stream"):
+                # streamed bodies are counted by the caller as they are read
+                metrics.inc("http_bytes_total", wire_bytes(resp, len(resp.content)), host=host)
+            return resp
+        except requests.RequestException as e:
+            metrics.inc("http_errors_total", host=host)
+            if _definitive(e):
+                if raise_definitive:
+                    raise
+                return None
+            time.sleep(backoff_delay(attempt, backoff))
             attempt += 1
     return None
 
 
+def get_with_retries(url: str, params: dict = None, **kwargs) -> Optional[requests.Response]:
+    return send_with_retries("GET", url, params=params, **kwargs)
+
+
+def request_with_retries(url: str, params: dict = None, headers: dict = None, retries: int = 3, backoff: float = 1.0, timeout=None, session: requests.Session = None):
+    resp = get_with_retries(url, params=params, headers=headers, retries=retries, backoff=backoff, timeout=timeout, session=session)
+    if resp is None:
+        return None
+    try:
+        return resp.json()
+    except ValueError:
+        return None
+
+
+def request_html_with_retries(url: str, headers: dict = None, retries: int = 3, backoff: float = 1.0, timeout=None, session: requests.Session = None):
+    resp = get_with_retries(url, headers=headers, retries=retries, backoff=backoff, timeout=timeout, session=session)
+    if resp is None:
+        return None
+    return resp.text
+
+
+def cached_lookup(key: str, fetch: Callable[[], Optional[List[Dict]]]) -> Optional[List[Dict]]:
+    """Return the cached result for ``key`` or call ``fetch`` and cache it.
+
+    ``fetch`` returns None when the API call failed; that is negative-cached
+    for FAILURE_TTL and reported as None so callers don't treat an outage as
+    "no results". Empty results are cached for EMPTY_TTL.
+    """
+    cached = disk_cache_get(key)
+    if cached is not None:
+        return None if cached == LOOKUP_FAILED else cached
+    results = fetch()
+    store_lookup(key, results)
+    return results
+
+
+def cached_value(key: str):
+    """``(hit, results)`` for a lookup key; results is None for a cached failure."""
+    cached = disk_cache_get(key)
+    if cached is None:
+        return False, None
+    return True, None if cached == LOOKUP_FAILED else cached
+
+
+def store_lookup(key: str, results: Optional[List[Dict]]):
+    if results is None:
+        disk_cache_set(key, LOOKUP_FAILED, ttl=FAILURE_TTL)
+    else:
+        disk_cache_set(key, results, ttl=None if results else EMPTY_TTL)
+
+
+def _refresh_entry(key: str) -> Optional[tuple]:
+    """``(value, created_at)`` of a cached lookup for a refresh, expired ones
+    included (a refresh goes by age, not expiry); None if there is none."""
+    entry = disk_cache_get_entry(key, allow_expired=True)
+    return None if entry is None or entry[0] == LOOKUP_FAILED else entry
+
+
+def _head(results: Optional[List[Dict]], n: int) -> Optional[List[Dict]]:
+    return None if results is None else results[:n]
+
+
+def _chunks(items: List, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _names(items) -> List[Dict]:
+    return [{"display_name": x.get("display_name")} for x in items or [] if x and x.get("display_name")]
+
+
+# cached records keep only the fields enrichment reads
+def project_openalex_author(a: Dict) -> Dict:
+    return {
+        "id": a.get("id"),
+        "display_name": a.get("display_name"),
+        "works_count": a.get("works_count"),
+        "x_concepts": _names(a.get("x_concepts")),
+        "institutions": _names(a.get("last_known_institutions") or a.get("institutions")),
+    }
+
+
+def project_openalex_work(w: Dict) -> Dict:
+    return {
+        "id": w.get("id"),
+        "title": w.get("title"),
+        "publication_year": w.get("publication_year"),
+        "concepts": _names(w.get("concepts")),
+    }
+
+
+def project_semanticscholar_author(a: Dict) -> Dict:
+    return {"authorId": a.get("authorId"), "name": a.get("name")}
+
+
+def project_semanticscholar_paper(p: Dict) -> Dict:
+    return {"paperId": p.get("paperId"), "title": p.get("title"), "year": p.get("year"), "fieldsOfStudy": p.get("fieldsOfStudy") or []}
+
+
 class OpenAlexClient:
     BASE = "https://api.openalex.org"
+    # OpenAlex accepts up to 100 OR-ed values per filter; authors are only
+    # batched while their works_count totals fit in one BATCH_PAGE_SIZE page
+    BATCH_SIZE = 50
+    BATCH_PAGE_SIZE = 200
+    # ``select=`` keeps responses to what the projections need
+    AUTHOR_FIELDS = "id,display_name,works_count,x_concepts,last_known_institutions"
+    WORK_FIELDS = "id,title,publication_year,concepts"
+
+    def __init__(self, session: requests.Session = None):
+        # None uses the shared pooled session for the host
+        self.session = session
 
     def search_authors(self, name: str, per_page: int = 5) -> Optional[List[Dict]]:
-        key = f"openalex:authors:{name}:{per_page}"
-        cached = disk_cache_get(key)
-        if cached is not None:
-            return cached
-        url = f"{self.BASE}/authors"
-        params = {"filter": f"display_name.search:{name}", "per-page": per_page}
-        data = request_with_retries(url, params=params)
-        results = []
-        if data and "results" in data:
-            for a in data["results"]:
-                results.append(a)
-        disk_cache_set(key, results)
-        return results
+        def fetch():
+            url = f"{self.BASE}/authors"
+            params = {"filter": f"display_name.search:{name}", "per-page": per_page, "select": self.AUTHOR_FIELDS}
+            data = request_with_retries(url, params=params, session=self.session)
+            if data is None:
+                return None
+            return [project_openalex_author(a) for a in data.get("results") or []]
 
-    def get_author_works(self, openalex_id: str, per_page: int = 5) -> Optional[List[Dict]]:
-        key = f"openalex:works:{openalex_id}:{per_page}"
-        cached = disk_cache_get(key)
-        if cached is not None:
-            return cached
-        # openalex author id is like https://openalex.org/A12345 or A12345
-        identifier = openalex_id.split('/')[-1]
+        return cached_lookup(author_search_key("openalex", name, per_page), fetch)
+
+    def _fetch_works(self, openalex_id: str) -> Optional[List[Dict]]:
         url = f"{self.BASE}/works"
-        params = {"filter": f"author.id:{identifier}", "per-page": per_page, "sort": "cited_by_count:desc"}
-        data = request_with_retries(url, params=params)
-        works = []
-        if data and "results" in data:
-            works = data["results"]
-        disk_cache_set(key, works)
-        return works
+        params = {"filter": f"author.id:{_short_id(openalex_id)}", "per-page": WORKS_LIMIT, "sort": "cited_by_count:desc", "select": self.WORK_FIELDS}
+        data = request_with_retries(url, params=params, session=self.session)
+        if data is None:
+            return None
+        return [project_openalex_work(w) for w in data.get("results") or []]
+
+    def get_author_works(self, openalex_id: str, per_page: int = 5) -> Optional[List[Dict]]:
+        """Top ``per_page`` (at most WORKS_LIMIT) works by citations."""
+        return _head(cached_lookup(works_key("openalex", openalex_id), lambda: self._fetch_works(openalex_id)), per_page)
+
+    def refresh_author_works(self, openalex_id: str, max_age: float, per_page: int = 5) -> Optional[List[Dict]]:
+        """``get_author_works``, revalidating a cached entry older than ``max_age`` seconds.
+
+        The cached entry is used by age, even past its expiry. A stale entry
+        is checked with a one-result ``from_publication_date``
+        query; if nothing was published since it was stored it is kept as is
+        (so its age keeps counting), otherwise, or once it is older than
+        WORKS_REFETCH_AGE, the works are fetched again. If the check fails the
+        stale works are returned.
+        """
+        key = works_key("openalex", openalex_id)
+        entry = _refresh_entry(key)
+        if entry is None:
+            return self.get_author_works(openalex_id, per_page=per_page)
+        works, created_at = entry
+        age = time.time() - created_at
+        if age < max_age:
+            return _head(works, per_page)
+        if age < WORKS_REFETCH_AGE:
+            since = time.strftime("%Y-%m-%d", time.gmtime(created_at - DAY))
+            url = f"{self.BASE}/works"
+            params = {"filter": f"author.id:{_short_id(openalex_id)},from_publication_date:{since}", "per-page": 1, "select": "id"}
+            data = request_with_retries(url, params=params, session=self.session)
+            if data is not None and not (data.get("meta") or {}).get("count"):
+                # not rewritten: the next refresh probes again from the same date
+                metrics.inc("revalidations_total", namespace="openalex", result="unchanged")
+                return _head(works, per_page)
+            fresh = self._fetch_works(openalex_id) if data is not None else None
+        else:
+            fresh = self._fetch_works(openalex_id)
+        if fresh is None:
+            metrics.inc("revalidations_total", namespace="openalex", result="error")
+            return _head(works, per_page)
+        metrics.inc("revalidations_total", namespace="openalex", result="changed" if fresh != works else "unchanged")
+        store_lookup(key, fresh)
+        return _head(fresh, per_page)
+
+    def get_works_for_authors(self, openalex_ids: List[str], per_page: int = 5, works_counts: Optional[Dict[str, int]] = None) -> Dict[str, Optional[List[Dict]]]:
+        """Top-cited works for many authors using OR-joined ``author.id`` filters.
+
+        Returns ``{openalex_id: works}`` and fills the same cache entries as
+        ``get_author_works``. A combined page is sorted by citations across
+        its authors, so only authors whose ``works_counts`` (the author
+        record's ``works_count``) add up to at most one page are batched;
+        the rest, and any author whose share still comes back cut off, get a
+        single-author request.
+        """
+        out: Dict[str, Optional[List[Dict]]] = {}
+        works_counts = works_counts or {}
+        missing = []
+        for oid in dict.fromkeys(i for i in openalex_ids if i):
+            hit, works = cached_value(works_key("openalex", oid))
+            if hit:
+                out[oid] = _head(works, per_page)
+            elif isinstance(works_counts.get(oid), int) and works_counts[oid] <= self.BATCH_PAGE_SIZE:
+                missing.append(oid)
+            else:
+                out[oid] = self.get_author_works(oid, per_page=per_page)
+        for chunk in self._pack(missing, works_counts):
+            if len(chunk) == 1:
+                out[chunk[0]] = self.get_author_works(chunk[0], per_page=per_page)
+                continue
+            url = f"{self.BASE}/works"
+            params = {
+                "filter": "author.id:" + "|".join(_short_id(i) for i in chunk),
+                "per-page": self.BATCH_PAGE_SIZE,
+                "sort": "cited_by_count:desc",
+                # authorships attribute a combined page's works to its authors
+                "select": self.WORK_FIELDS + ",authorships",
+            }
+            data = request_with_retries(url, params=params, session=self.session)
+            if data is None:
+                for oid in chunk:
+                    store_lookup(works_key("openalex", oid), None)
+                    out[oid] = None
+                continue
+            results = data.get("results") or []
+            # works_count may be out of date; check the page really held everything
+            truncated = (data.get("meta") or {}).get("count", 0) > len(results)
+            by_author = {_short_id(i): [] for i in chunk}
+            for w in results:
+                for authorship in w.get("authorships") or []:
+                    sid = _short_id((authorship.get("author") or {}).get("id"))
+                    if sid in by_author and len(by_author[sid]) < WORKS_LIMIT:
+                        by_author[sid].append(project_openalex_work(w))
+            for oid in chunk:
+                works = by_author[_short_id(oid)]
+                if truncated and len(works) < WORKS_LIMIT:
+                    out[oid] = self.get_author_works(oid, per_page=per_page)
+                    continue
+                store_lookup(works_key("openalex", oid), works)
+                out[oid] = works[:per_page]
+        return out
+
+    def _pack(self, openalex_ids: List[str], works_counts: Dict[str, int]) -> List[List[str]]:
+        # first-fit decreasing: chunks of at most BATCH_SIZE authors whose
+        # works (co-authored ones counted twice) fit in one page
+        chunks: List[List[str]] = []
+        room: List[int] = []
+        for oid in sorted(openalex_ids, key=lambda i: -works_counts[i]):
+            for n, chunk in enumerate(chunks):
+                if len(chunk) < self.BATCH_SIZE and works_counts[oid] <= room[n]:
+                    chunk.append(oid)
+                    room[n] -= works_counts[oid]
+                    break
+            else:
+                chunks.append([oid])
+                room.append(self.BATCH_PAGE_SIZE - works_counts[oid])
+        return chunks
 
 
 class SemanticScholarClient:
     BASE = "https://api.semanticscholar.org/graph/v1"
+    AUTHOR_FIELDS = "authorId,name"
+    PAPER_FIELDS = "paperId,title,year,fieldsOfStudy"
+    # POST /author/batch accepts up to 1000 ids
+    BATCH_SIZE = 100
+
+    def __init__(self, session: requests.Session = None):
+        # None uses the shared pooled session for the host
+        self.session = session
 
     def search_author(self, name: str, limit: int = 5) -> Optional[List[Dict]]:
-        key = f"semanticscholar:authors:{name}:{limit}"
-        cached = disk_cache_get(key)
-        if cached is not None:
-            return cached
-        url = f"{self.BASE}/author/search"
-        params = {"query": name, "limit": limit}
-        data = request_with_retries(url, params=params)
-        authors = []
-        if data and "data" in data:
-            authors = data["data"]
-        disk_cache_set(key, authors)
-        return authors
+        def fetch():
+            url = f"{self.BASE}/author/search"
+            params = {"query": name, "limit": limit, "fields": self.AUTHOR_FIELDS}
+            data = request_with_retries(url, params=params, session=self.session)
+            if data is None:
+                return None
+            return [project_semanticscholar_author(a) for a in data.get("data") or []]
 
-    def get_author_papers(self, author_id: str, limit: int = 5) -> Optional[List[Dict]]:
-        key = f"semanticscholar:works:{author_id}:{limit}"
-        cached = disk_cache_get(key)
-        if cached is not None:
-            return cached
-        # fields: title,year,externalIds
+        return cached_lookup(author_search_key("semanticscholar", name, limit), fetch)
+
+    def _fetch_papers(self, author_id: str) -> Optional[List[Dict]]:
         url = f"{self.BASE}/author/{author_id}/papers"
-        params = {"limit": limit, "fields": "paperId,title,year,externalIds,fieldsOfStudy"}
-        data = request_with_retries(url, params=params)
-        papers = []
-        if data and "data" in data:
-            papers = [p.get("paper", {}) for p in data["data"]]
-        disk_cache_set(key, papers)
-        return papers
+        params = {"limit": WORKS_LIMIT, "fields": self.PAPER_FIELDS}
+        data = request_with_retries(url, params=params, session=self.session)
+        if data is None:
+            return None
+        # entries are papers; older responses wrapped them in "paper"
+        return [project_semanticscholar_paper(p.get("paper", p)) for p in data.get("data") or []]
+
+    def get_author_papers(self, author_id: str, limit: int = 5) -> Optional[List[Dict]]:
+        """First ``limit`` (at most WORKS_LIMIT) papers of an author."""
+        return _head(cached_lookup(works_key("semanticscholar", author_id), lambda: self._fetch_papers(author_id)), limit)
+
+    def refresh_author_papers(self, author_id: str, max_age: float, limit: int = 5) -> Optional[List[Dict]]:
+        """``get_author_papers``, fetching again when the cached entry (even an
+        expired one) is older than ``max_age`` seconds; the API has no
+        conditional requests."""
+        key = works_key("semanticscholar", author_id)
+        entry = _refresh_entry(key)
+        if entry is None:
+            return self.get_author_papers(author_id, limit=limit)
+        papers, created_at = entry
+        if time.time() - created_at < max_age:
+            return _head(papers, limit)
+        fresh = self._fetch_papers(author_id)
+        if fresh is None:
+            metrics.inc("revalidations_total", namespace="semanticscholar", result="error")
+            return _head(papers, limit)
+        metrics.inc("revalidations_total", namespace="semanticscholar", result="changed" if fresh != papers else "unchanged")
+        store_lookup(key, fresh)
+        return _head(fresh, limit)
+
+    def get_papers_for_authors(self, author_ids: List[str], limit: int = 5) -> Dict[str, Optional[List[Dict]]]:
+        """Papers for many authors via ``POST /author/batch``.
+
+        Returns ``{author_id: papers}`` and fills the same cache entries as
+        ``get_author_papers``.
+        """
+        out: Dict[str, Optional[List[Dict]]] = {}
+        missing = []
+        for aid in dict.fromkeys(str(i) for i in author_ids if i):
+            hit, papers = cached_value(works_key("semanticscholar", aid))
+            if hit:
+                out[aid] = _head(papers, limit)
+            else:
+                missing.append(aid)
+        fields = ",".join(["authorId"] + [f"papers.{f}" for f in self.PAPER_FIELDS.split(",")])
+        for chunk in _chunks(missing, self.BATCH_SIZE):
+            url = f"{self.BASE}/author/batch"
+            resp = send_with_retries("POST", url, params={"fields": fields}, json={"ids": chunk}, session=self.session)
+            try:
+                data = resp.json() if resp is not None else None
+            except ValueError:
+                data = None
+            if not isinstance(data, list):
+                for aid in chunk:
+                    store_lookup(works_key("semanticscholar", aid), None)
+                    out[aid] = None
+                continue
+            # the response is aligned with the requested ids, null for unknown ones
+            for aid, author in zip(chunk, data):
+                papers = [project_semanticscholar_paper(p) for p in ((author or {}).get("papers") or [])[:WORKS_LIMIT]]
+                store_lookup(works_key("semanticscholar", aid), papers)
+                out[aid] = papers[:limit]
+        return out
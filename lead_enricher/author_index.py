@@ -0,0 +1,232 @@
+"""Local author index for offline name lookups.
+
+The index lives in a directory of flat files that are memory-mapped on load:
+
+- ``records.jsonl``: one ``{"source", "author"}`` record per line
+- ``offsets.npy``: byte offset of each record (plus the end offset)
+- ``keys.npy`` / ``key_starts.npy``: sorted 64-bit hashes of the normalized
+  name tokens and where each token's postings start
+- ``postings.npy``: record numbers grouped by token
+
+Build it from cached API search results or from a JSONL snapshot of author
+objects (OpenAlex or Semantic Scholar shape)::
+
+    python -m lead_enricher.author_index build [--snapshot authors.jsonl]
+"""
+import os
+import sys
+import json
+import mmap
+import shutil
+import hashlib
+import argparse
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .apis import project_openalex_author, project_semanticscholar_author
+from .cache_utils import CACHE_DIR, get_cache
+from .scoring import normalize_name, best_match
+
+INDEX_DIR = os.path.join(CACHE_DIR, "author_index")
+# tokens shared by more authors than this (common first names) are not used
+# for candidate retrieval unless the query has nothing rarer
+MAX_POSTINGS = 2000
+MAX_CANDIDATES = 200
+NAME_FIELD = {"openalex": "display_name", "semanticscholar": "name"}
+PROJECT = {"openalex": project_openalex_author, "semanticscholar": project_semanticscholar_author}
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _blocking_keys(name: str) -> List[str]:
+    return [t for t in dict.fromkeys(normalize_name(name).split()) if len(t) > 1]
+
+
+def _author_id(source: str, author: dict) -> Optional[str]:
+    return author.get("id") if source == "openalex" else (author.get("authorId") or author.get("id"))
+
+
+def _source_of(obj: dict) -> str:
+    if obj.get("source") in NAME_FIELD:
+        return obj["source"]
+    return "semanticscholar" if "authorId" in obj else "openalex"
+
+
+def records_from_cache() -> Iterator[Tuple[str, dict]]:
+    """Authors from cached OpenAlex and Semantic Scholar search results."""
+    cache = get_cache()
+    for source in NAME_FIELD:
+        for _, authors in cache.iter_prefix(f"{source}:authors:"):
+            if isinstance(authors, list):
+                for a in authors:
+                    if isinstance(a, dict):
+                        yield source, a
+
+
+def records_from_snapshot(path: str) -> Iterator[Tuple[str, dict]]:
+    """Authors from a JSONL file, one author object per line."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(obj, dict):
+                source = _source_of(obj)
+                yield source, obj.get("author", obj)
+
+
+def build_index(records: Iterable[Tuple[str, dict]], path: str = INDEX_DIR) -> int:
+    """Write an index of ``(source, author)`` records to ``path``; returns its size.
+
+    Records are de-duplicated by source and author id and stored in the same
+    projected form as cached lookups. The new index replaces any existing one
+    only once it is fully written.
+    """
+    tmp = f"{path}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    seen = set()
+    offsets = [0]
+    postings: Dict[int, List[int]] = defaultdict(list)
+    with open(os.path.join(tmp, "records.jsonl"), "wb") as f:
+        for source, author in records:
+            name = author.get(NAME_FIELD[source])
+            aid = _author_id(source, author)
+            if not name or not aid or (source, aid) in seen:
+                continue
+            seen.add((source, aid))
+            n = len(offsets) - 1
+            for token in _blocking_keys(name):
+                postings[_token_hash(token)].append(n)
+            line = json.dumps({"source": source, "author": PROJECT[source](author)}, separators=(",", ":")).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    keys = np.array(sorted(postings), dtype=np.uint64)
+    starts = np.zeros(len(keys) + 1, dtype=np.int64)
+    flat = []
+    for i, k in enumerate(keys):
+        flat.extend(postings[int(k)])
+        starts[i + 1] = len(flat)
+    np.save(os.path.join(tmp, "offsets.npy"), np.array(offsets, dtype=np.int64))
+    np.save(os.path.join(tmp, "keys.npy"), keys)
+    np.save(os.path.join(tmp, "key_starts.npy"), starts)
+    np.save(os.path.join(tmp, "postings.npy"), np.array(flat, dtype=np.int32))
+    old = f"{path}.old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return len(offsets) - 1
+
+
+class AuthorIndex:
+    """Read-only, memory-mapped author index (see module docstring)."""
+
+    def __init__(self, path: str = INDEX_DIR):
+        self.path = path
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.keys = np.load(os.path.join(path, "keys.npy"), mmap_mode="r")
+        self.key_starts = np.load(os.path.join(path, "key_starts.npy"), mmap_mode="r")
+        self.postings = np.load(os.path.join(path, "postings.npy"), mmap_mode="r")
+        # the mmap keeps its own descriptor, so the file needn't stay open
+        with open(os.path.join(path, "records.jsonl"), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def record(self, n: int) -> Tuple[str, dict]:
+        rec = json.loads(self._records[int(self.offsets[n]):int(self.offsets[n + 1])])
+        return rec["source"], rec["author"]
+
+    def _postings(self, token: str) -> np.ndarray:
+        h = np.uint64(_token_hash(token))
+        i = int(np.searchsorted(self.keys, h))
+        if i >= len(self.keys) or self.keys[i] != h:
+            return self.postings[0:0]
+        return self.postings[int(self.key_starts[i]):int(self.key_starts[i + 1])]
+
+    def candidates(self, name: str) -> List[int]:
+        lists = sorted((self._postings(t) for t in _blocking_keys(name)), key=len)
+        lists = [p for p in lists if len(p)]
+        if not lists:
+            return []
+        usable = [p for p in lists if len(p) <= MAX_POSTINGS] or lists[:1]
+        found, counts = np.unique(np.concatenate(usable), return_counts=True)
+        # records sharing the most query tokens first
+        order = np.argsort(-counts, kind="stable")[:MAX_CANDIDATES]
+        return [int(n) for n in found[order]]
+
+    def lookup(self, name: str) -> Tuple[int, Optional[Tuple[str, dict]]]:
+        """Best indexed author for ``name`` as ``(score, (source, author))``."""
+        if not name or not len(self):
+            return 0, None
+        recs = [self.record(n) for n in self.candidates(name)]
+        idx, score = best_match(name, [a.get(NAME_FIELD[src]) for src, a in recs])
+        if idx < 0 or score <= 0:
+            return 0, None
+        return score, recs[idx]
+
+    def close(self):
+        """Unmap now; only safe once no other thread can still use the index."""
+        if isinstance(self._records, mmap.mmap):
+            self._records.close()
+
+
+_index: Optional[AuthorIndex] = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_author_index() -> Optional[AuthorIndex]:
+    """The process-wide index, or None if none has been built."""
+    global _index, _index_loaded
+    with _index_lock:
+        if not _index_loaded:
+            _index_loaded = True
+            _index = AuthorIndex(INDEX_DIR) if os.path.exists(os.path.join(INDEX_DIR, "offsets.npy")) else None
+        return _index
+
+
+def reload_author_index() -> Optional[AuthorIndex]:
+    global _index, _index_loaded
+    with _index_lock:
+        # rows in flight may still hold the old index; it is unmapped once
+        # the last of them drops it
+        _index, _index_loaded = None, False
+    return get_author_index()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m lead_enricher.author_index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build the index from cached lookups and optional snapshots")
+    build.add_argument("--snapshot", action="append", default=[], help="JSONL file of author objects (repeatable)")
+    build.add_argument("--no-cache", action="store_true", help="don't include cached API search results")
+    build.add_argument("--path", default=INDEX_DIR)
+    args = parser.parse_args(argv)
+
+    def records():
+        if not args.no_cache:
+            yield from records_from_cache()
+        for snapshot in args.snapshot:
+            yield from records_from_snapshot(snapshot)
+
+    n = build_index(records(), args.path)
+    print(f"indexed {n} authors into {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Normalized cache and lookup keys.
+
+Equivalent inputs map to one key ("Jane  Doe" / "jane doe", "Acme, Inc." /
+"ACME", "https://www.acme.com/about" / "acme.com") and no key depends on
+job settings such as ``num_papers``.
+"""
+import re
+import unicodedata
+from urllib.parse import urlsplit
+
+# trailing company-name tokens that don't identify the company
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "ltd", "limited", "corp", "corporation", "co", "company",
+    "plc", "gmbh", "ag", "sa", "sas", "bv", "nv", "srl", "spa", "oy", "ab", "as", "pty", "kk",
+}
+_PUNCT = re.compile(r"[^\w\s&]+")
+
+
+def normalize_name_key(name: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", name or "").casefold().split())
+
+
+def normalize_company_key(company: str) -> str:
+    tokens = _PUNCT.sub(" ", unicodedata.normalize("NFKC", company or "").casefold()).split()
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def website_domain(website: str) -> str:
+    website = (website or "").strip()
+    if not website:
+        return ""
+    if "://" not in website:
+        website = f"http://{website}"
+    parts = urlsplit(website)
+    host = (parts.hostname or "").lower()
+    host = host[4:] if host.startswith("www.") else host
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    # a non-default port is a different site
+    return f"{host}:{port}" if host and port not in (None, 80, 443) else host
+
+
+def openalex_short_id(openalex_id: str) -> str:
+    # openalex author id is like https://openalex.org/A12345 or A12345
+    return (openalex_id or "").rstrip("/").split("/")[-1]
+
+
+def author_search_key(source: str, name: str, limit: int) -> str:
+    return f"{source}:authors:{normalize_name_key(name)}:{limit}"
+
+
+def works_key(source: str, author_id: str) -> str:
+    if source == "openalex":
+        return f"openalex:works:{openalex_short_id(author_id)}"
+    return f"{source}:works:{author_id}"
+
+
+def website_key(website: str) -> str:
+    return f"website:{website_domain(website)}"
+
+
+def enrich_key(name: str, company: str, website: str) -> str:
+    return f"enrich:{normalize_name_key(name)}:{normalize_company_key(company)}:{website_domain(website)}"
@@ -1,32 +1,354 @@
 import os
 import json
-import hashlib
-from typing import Optional
+import time
+import zlib
+import atexit
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterator, Optional, Tuple
+
+from .metrics import metrics
 
 CACHE_DIR = os.path.join(os.getcwd(), ".cache", "lead_enricher")
+CACHE_FILE = "cache.sqlite3"
+
+DAY = 24 * 3600
+# seconds until an entry expires, by key prefix; None never expires
+NAMESPACE_TTLS: Dict[str, Optional[float]] = {
+    "openalex": 30 * DAY,
+    "semanticscholar": 30 * DAY,
+    "enrich": 14 * DAY,
+    "website": 7 * DAY,
+}
+DEFAULT_TTL = 30 * DAY
+# negative caching: a lookup that failed (API error/outage) is retried soon,
+# a lookup that succeeded with no results is trusted for longer
+FAILURE_TTL = 10 * 60
+EMPTY_TTL = 3 * DAY
+LOOKUP_FAILED = "__lookup_failed__"
+# expired entries stay on disk this long, so a refresh run can revalidate
+# them instead of looking everything up again
+EXPIRED_GRACE = 90 * DAY
+MEMORY_CACHE_SIZE = 4096
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+WRITE_BATCH_SIZE = 64
+# values whose JSON is at least this long are stored zlib-compressed (as a BLOB)
+COMPRESS_MIN_BYTES = 512
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    value BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at);
+"""
+
 
 def ensure_cache_dir():
     os.makedirs(CACHE_DIR, exist_ok=True)
 
-def _key_to_path(key: str) -> str:
-    ensure_cache_dir()
-    h = hashlib.sha256(key.encode("utf-8")).hexdigest()
-    return os.path.join(CACHE_DIR, f"{h}.json")
+
+def namespace_of(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+def encode_value(value, compress_min: int = COMPRESS_MIN_BYTES):
+    """Compact JSON text, or zlib-compressed JSON bytes for larger values."""
+    text = json.dumps(value, separators=(",", ":"))
+    if len(text) < compress_min:
+        return text
+    return zlib.compress(text.encode("utf-8"))
+
+
+def decode_value(stored):
+    if isinstance(stored, bytes):
+        stored = zlib.decompress(stored).decode("utf-8")
+    return json.loads(stored)
+
+
+class SqliteCache:
+    """Single-file cache in SQLite (WAL mode) with TTLs and LRU eviction.
+
+    Writes and access-time updates are buffered and flushed in one
+    transaction every ``batch_size`` writes; reads see buffered writes.
+    Each thread gets its own connection, and WAL plus a busy timeout lets
+    several processes share the file.
+    """
+
+    def __init__(self, path: str, ttls: Optional[Dict[str, Optional[float]]] = None, max_bytes: int = MAX_CACHE_BYTES, batch_size: int = WRITE_BATCH_SIZE):
+        self.path = path
+        self.ttls = {**NAMESPACE_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, tuple] = {}
+        self._touched: Dict[str, float] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ttl_for(self, key: str) -> Optional[float]:
+        return self.ttls.get(namespace_of(key), DEFAULT_TTL)
+
+    def get(self, key: str):
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str, allow_expired: bool = False) -> Optional[Tuple[object, Optional[float], float]]:
+        """Return ``(value, expires_at, created_at)`` or None on a miss.
+
+        With ``allow_expired`` an expired entry still on disk is returned too.
+        """
+        now = time.time()
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            _, text, created_at, expires_at = pending
+        else:
+            try:
+                row = self._conn().execute("SELECT value, expires_at, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error:
+                return None
+            if row is None:
+                return None
+            text, expires_at, created_at = row
+        if expires_at is not None and expires_at <= now and not allow_expired:
+            return None
+        with self._lock:
+            self._touched[key] = now
+        try:
+            return decode_value(text), expires_at, created_at
+        except (ValueError, zlib.error):
+            return None
+
+    def set(self, key: str, value, ttl: Optional[float] = None) -> Optional[float]:
+        """Buffer a write; returns the entry's expiry time."""
+        now = time.time()
+        ttl = self.ttl_for(key) if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        try:
+            text = encode_value(value)
+        except (TypeError, ValueError):
+            return expires_at
+        with self._lock:
+            self._pending[key] = (namespace_of(key), text, now, expires_at)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+        return expires_at
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            touched, self._touched = self._touched, {}
+        if not pending and not touched:
+            return
+        try:
+            conn = self._conn()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache (key, namespace, value, created_at, accessed_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(k, ns, text, now, now, exp) for k, (ns, text, now, exp) in pending.items()],
+                )
+                conn.executemany("UPDATE cache SET accessed_at = ? WHERE key = ?", [(t, k) for k, t in touched.items()])
+            if pending:
+                self.evict()
+        except sqlite3.Error:
+            pass
+
+    def used_bytes(self) -> int:
+        conn = self._conn()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return page_size * pages
+
+    def evict(self):
+        """Drop entries expired over EXPIRED_GRACE ago (failures at once), then
+        least recently used ones while over ``max_bytes``."""
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ? AND (expires_at <= ? OR value = ?)",
+                (now, now - EXPIRED_GRACE, encode_value(LOOKUP_FAILED)),
+            )
+        if self.used_bytes() <= self.max_bytes:
+            return
+        # evict down to 90% so we don't evict again on the next flush
+        target = int(self.max_bytes * 0.9)
+        while self.used_bytes() > target:
+            with conn:
+                deleted = conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT 500)"
+                ).rowcount
+            if not deleted:
+                break
+
+    def iter_prefix(self, prefix: str) -> Iterator[Tuple[str, object]]:
+        """Yield unexpired ``(key, value)`` pairs whose key starts with ``prefix``."""
+        self.flush()
+        # range scan on the primary key
+        end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        rows = self._conn().execute(
+            "SELECT key, value FROM cache WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at > ?)",
+            (prefix, end, time.time()),
+        )
+        for key, text in rows:
+            try:
+                yield key, decode_value(text)
+            except (ValueError, zlib.error):
+                continue
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._touched.clear()
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM cache")
+
+
+class LRUCache:
+    """Bounded in-process LRU honoring the disk entries' expiry times.
+
+    Entries keep the disk entry's creation time so callers can tell its age.
+    """
+
+    def __init__(self, maxsize: int = MEMORY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, object]:
+        hit, value, _ = self.get_entry(key)
+        return hit, value
+
+    def get_entry(self, key: str) -> Tuple[bool, object, Optional[float]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None, None
+            value, expires_at, created_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return False, None, None
+            self._data.move_to_end(key)
+            return True, value, created_at
+
+    def set(self, key: str, value, expires_at: Optional[float], created_at: Optional[float] = None):
+        with self._lock:
+            self._data[key] = (value, expires_at, created_at if created_at is not None else time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_memory = LRUCache()
+# lookups per namespace: memory hits, disk hits, misses
+_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+_stats_lock = threading.Lock()
+_cache: Optional[SqliteCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> SqliteCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            ensure_cache_dir()
+            _cache = SqliteCache(os.path.join(CACHE_DIR, CACHE_FILE))
+        return _cache
+
+
+def configure_cache(path: Optional[str] = None, ttls: Optional[Dict[str, Optional[float]]] = None, max_bytes: Optional[int] = None):
+    """Replace the process-wide cache, e.g. to point it at another file."""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.flush()
+        _memory.clear()
+        _cache = SqliteCache(
+            path or os.path.join(CACHE_DIR, CACHE_FILE),
+            ttls=ttls,
+            max_bytes=max_bytes or MAX_CACHE_BYTES,
+        )
+        return _cache
+
+
+def _count(key: str, outcome: str):
+    with _stats_lock:
+        _stats[namespace_of(key)][outcome] += 1
+    metrics.inc("cache_lookups_total", namespace=namespace_of(key), result=outcome)
+
 
 def disk_cache_get(key: str) -> Optional[dict]:
-    path = _key_to_path(key)
-    if not os.path.exists(path):
-        return None
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
+    entry = disk_cache_get_entry(key)
+    return entry[0] if entry is not None else None
+
+
+def disk_cache_get_entry(key: str, allow_expired: bool = False) -> Optional[Tuple[object, float]]:
+    """``(value, created_at)``, or None on a miss; ``created_at`` is when the
+    value was last stored (or revalidated).
+
+    With ``allow_expired`` an expired value kept for EXPIRED_GRACE is
+    returned as well (never an expired failure), for callers that check its
+    age themselves.
+    """
+    hit, value, created_at = _memory.get_entry(key)
+    if hit:
+        _count(key, "memory_hits")
+        return value, created_at
+    entry = get_cache().get_entry(key, allow_expired=allow_expired)
+    now = time.time()
+    expired = entry is not None and entry[1] is not None and entry[1] <= now
+    if entry is None or (expired and entry[0] == LOOKUP_FAILED):
+        _count(key, "misses")
         return None
+    _count(key, "disk_hits")
+    value, expires_at, created_at = entry
+    if not expired:
+        _memory.set(key, value, expires_at, created_at)
+    return value, created_at
+
+
+def disk_cache_set(key: str, value: dict, ttl: Optional[float] = None):
+    """Store ``value``; ``ttl`` overrides the namespace TTL (seconds)."""
+    expires_at = get_cache().set(key, value, ttl=ttl)
+    _memory.set(key, value, expires_at)
+
+
+def cache_stats(reset: bool = False) -> Dict[str, Dict[str, int]]:
+    """Lookup counts per namespace since start (or the last reset)."""
+    with _stats_lock:
+        out = {ns: dict(c) for ns, c in _stats.items()}
+        if reset:
+            _stats.clear()
+    return out
+
+
+def disk_cache_flush():
+    if _cache is not None:
+        _cache.flush()
+
 
-def disk_cache_set(key: str, value: dict):
-    path = _key_to_path(key)
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(value, f)
-    except Exception:
-        pass
+atexit.register(disk_cache_flush)
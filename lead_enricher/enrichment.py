@@ -1,15 +1,46 @@
 import pandas as pd
 import time
 import re
-from typing import Dict, Any
-from html import unescape
-from .apis import OpenAlexClient, SemanticScholarClient, request_html_with_retries
-from .scoring import name_match_score, confidence_label
-from .cache_utils import disk_cache_get, disk_cache_set
+import threading
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, Iterable, Iterator, Optional
+from .apis import OpenAlexClient, SemanticScholarClient, WORKS_LIMIT
+from .scoring import best_match, best_matches, confidence_label
+from .cache_utils import disk_cache_get_entry, disk_cache_set, disk_cache_flush, DAY
+from .rate_limit import limiter
+from .singleflight import SingleFlight
+from .cache_keys import normalize_name_key, website_domain, enrich_key, works_key
+from .website import summarize_website
+from .utils import iter_csv_rows, CSV_CHUNK_ROWS, REFRESH_COLUMN
+from .journal import JobJournal
+from .author_index import get_author_index
+from .sessions import sessions
+from .metrics import metrics, delta, log_summary
 
 oa = OpenAlexClient()
 ss = SemanticScholarClient()
 
+DEFAULT_CONCURRENCY = 8
+DEFAULT_LOOKUP_BATCH_SIZE = 50
+# "sequential": Semantic Scholar only after a weak OpenAlex match (fewest requests);
+# "parallel": both searches start together, OpenAlex still preferred;
+# "hedged": the first confident match wins and the other search is dropped.
+# Semantic Scholar allows ~1 request/s, so the concurrent modes only start its
+# search early when its rate limit has a token to spare.
+SEARCH_MODES = ("sequential", "parallel", "hedged")
+DEFAULT_SEARCH_MODE = "sequential"
+# seconds between checks that a row's stage futures weren't cancelled
+STAGE_POLL = 1.0
+# per row: website summary plus two author searches
+STAGES_PER_ROW = 3
+ERROR_COLUMN = "Enrichment Error"
+# journal error for rows whose API lookups failed; the output is partial
+LOOKUP_FAILED_ERROR = "lookup failed"
+# in refresh mode, cached works and websites older than this are revalidated
+REFRESH_AFTER_DAYS = 30
+
 @pd.api.extensions.register_dataframe_accessor("enricher")
 class EnricherAccessor:
     def __init__(self, pandas_obj):
@@ -79,40 +110,241 @@ def _generate_company_hook(company: str, company_summary: str) -> str:
         s = f"I noticed the company is building {desc_short}."
     return _truncate_words(s, 22)
 
-def enrich_row(row: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
+def _cell(row: Dict[str, Any], *cols: str) -> str:
+    # first non-empty column; pandas gives NaN (a float) for empty cells
+    for col in cols:
+        value = row.get(col)
+        if isinstance(value, str):
+            if value.strip():
+                return value.strip()
+        elif value is not None and not pd.isna(value):
+            return str(value).strip()
+    return ""
+
+
+def _row_fields(row: Dict[str, Any]):
     # read Apollo-style columns and build search name
-    first = (row.get("First Name") or row.get("first_name") or row.get("firstName") or "").strip()
-    last = (row.get("Last Name") or row.get("last_name") or row.get("lastName") or "").strip()
-    company = (row.get("Company Name") or row.get("company") or row.get("company_name") or "").strip()
-    website = (row.get("Website") or row.get("website") or "").strip()
-    full_name_field = row.get("full_name") or row.get("Full Name")
-    name = (full_name_field or f"{first} {last}".strip()).strip()
-
-    cache_key = f"enrich:{name}:{company}:{settings.get('num_papers')}"
-    cached = disk_cache_get(cache_key)
-    if cached is not None:
-        return {**row, **cached}
-
-    # try OpenAlex
-    authors = oa.search_authors(name, per_page=5) or []
-    best_author = None
-    best_score = 0
-    for a in authors:
-        cand_name = a.get("display_name")
-        s = name_match_score(name, cand_name)
-        if s > best_score:
-            best_score = s
-            best_author = ("openalex", a)
-
-    # fallback semantic scholar
-    if best_author is None or best_score < settings.get("match_score_threshold", 60):
-        ssa = ss.search_author(name, limit=5) or []
-        for a in ssa:
-            cand_name = a.get("name")
-            s = name_match_score(name, cand_name)
-            if s > best_score:
-                best_score = s
-                best_author = ("semanticscholar", a)
+    first = _cell(row, "First Name", "first_name", "firstName")
+    last = _cell(row, "Last Name", "last_name", "lastName")
+    company = _cell(row, "Company Name", "company", "company_name")
+    website = _cell(row, "Website", "website")
+    full_name_field = _cell(row, "full_name", "Full Name")
+    name = full_name_field or f"{first} {last}".strip()
+    return name, company, website
+
+
+def _enrich_cache_key(name: str, company: str, website: str) -> str:
+    # settings-independent: the record holds raw lookups, not final columns
+    return enrich_key(name, company, website)
+
+
+# candidate name field per source, in order of preference
+CANDIDATE_NAME = {"openalex": "display_name", "semanticscholar": "name"}
+SOURCES = tuple(CANDIDATE_NAME)
+
+
+def _timed(stage: str, fn: Callable, *args, **kwargs):
+    with metrics.timer("stage_seconds", stage=stage):
+        return fn(*args, **kwargs)
+
+
+def _search_authors(source: str, name: str, flight: SingleFlight) -> Optional[list]:
+    name_key = normalize_name_key(name)
+    if source == "openalex":
+        return flight.do(f"openalex_search:{name_key}", lambda: _timed("openalex_search", oa.search_authors, name, per_page=5))
+    return flight.do(f"semanticscholar_search:{name_key}", lambda: _timed("semanticscholar_search", ss.search_author, name, limit=5))
+
+
+def _candidate_names(source: str, authors: Optional[list]) -> list:
+    return [a.get(CANDIDATE_NAME[source]) for a in authors or []]
+
+
+def _index_match(name: str, settings: Dict[str, Any]):
+    """``(score, (source, author))`` from the local author index, or ``(0, None)``."""
+    if not settings.get("use_author_index", True):
+        return 0, None
+    index = get_author_index()
+    if index is None:
+        return 0, None
+    return _timed("author_index", index.lookup, name)
+
+
+def _search_mode(settings: Dict[str, Any]) -> str:
+    mode = settings.get("search_mode", DEFAULT_SEARCH_MODE)
+    return mode if mode in SEARCH_MODES else DEFAULT_SEARCH_MODE
+
+
+def _source_match(name: str, source: str, authors: Optional[list]) -> Optional[list]:
+    # [score, best candidate or None]; None when the search failed
+    if authors is None:
+        return None
+    idx, score = best_match(name, _candidate_names(source, authors))
+    return [score, authors[idx]] if idx >= 0 else [0, None]
+
+
+def _pick(matches: Dict[str, Any], settings: Dict[str, Any]):
+    """Best ``(score, (source, author) or None)`` among per-source matches.
+
+    The index match comes first, then OpenAlex; a later source only replaces
+    a match below the threshold, and only with a strictly higher score.
+    """
+    threshold = settings.get("match_score_threshold", 60)
+    best_score, best_author = 0, None
+    indexed = matches.get("index")
+    if indexed and settings.get("use_author_index", True):
+        best_score, best_author = indexed[0], (indexed[1], indexed[2])
+    for source in SOURCES:
+        if best_author is not None and best_score >= threshold:
+            break
+        m = matches.get(source)
+        if m and m[1] is not None and m[0] > best_score:
+            best_score, best_author = m[0], (source, m[1])
+    return best_score, best_author
+
+
+def _confident(m: Optional[list], threshold: int) -> bool:
+    return bool(m) and m[1] is not None and m[0] >= threshold
+
+
+def _match_author(name: str, settings: Dict[str, Any], flight: SingleFlight, stages: Optional[ThreadPoolExecutor] = None):
+    """Per-source author matches as ``(matches, lookup_failed)``.
+
+    ``matches`` maps each searched source to ``[score, author]`` (None if the
+    search failed) and "index" to ``[score, source, author]``; see ``_pick``.
+    The local author index is consulted first; the live APIs are only
+    searched when its best match is below ``match_score_threshold``. With
+    ``stages`` the searches run concurrently as set by ``search_mode``, but a
+    Semantic Scholar search that would wait on its rate limit is left until
+    OpenAlex has proved too weak, as in "sequential".
+    """
+    threshold = settings.get("match_score_threshold", 60)
+    matches: Dict[str, Any] = {}
+    score, indexed = _index_match(name, settings)
+    if indexed is not None:
+        matches["index"] = [score, indexed[0], indexed[1]]
+        if score >= threshold:
+            return matches, False
+
+    mode = _search_mode(settings)
+    if stages is None or mode == "sequential":
+        # try OpenAlex, then fall back to Semantic Scholar below the threshold
+        for source in SOURCES:
+            score, best_author = _pick(matches, settings)
+            if best_author is not None and score >= threshold:
+                break
+            matches[source] = _source_match(name, source, _search_authors(source, name, flight))
+    else:
+        futures = {stages.submit(_search_authors, SOURCES[0], name, flight): SOURCES[0]}
+        if limiter.ready(ss.BASE):
+            futures[stages.submit(_search_authors, SOURCES[1], name, flight)] = SOURCES[1]
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=STAGE_POLL, return_when=FIRST_COMPLETED)
+            # wait() misses futures cancelled by a pool shutdown; result() raises for them
+            done |= {fut for fut in pending if fut.cancelled()}
+            pending -= done
+            for fut in done:
+                matches[futures[fut]] = _source_match(name, futures[fut], fut.result())
+            if mode == "hedged":
+                if any(_confident(matches.get(source), threshold) for source in SOURCES):
+                    break
+            elif _confident(matches.get("openalex"), threshold):
+                break
+        for fut in pending:
+            # a search already running finishes in the background and is cached
+            fut.cancel()
+        score, best_author = _pick(matches, settings)
+        if SOURCES[1] not in matches and (best_author is None or score < threshold):
+            matches[SOURCES[1]] = _source_match(name, SOURCES[1], _search_authors(SOURCES[1], name, flight))
+    return matches, any(source in matches and matches[source] is None for source in SOURCES)
+
+
+def _author_id(source: str, author: Dict[str, Any]) -> str:
+    return author.get("id") if source == "openalex" else (author.get("authorId") or author.get("id"))
+
+
+def _covers(raw: Any, settings: Dict[str, Any]) -> bool:
+    """Whether a cached raw record has every lookup ``settings`` need."""
+    if not isinstance(raw, dict) or "matches" not in raw:
+        return False
+    matches = raw["matches"]
+    score, best_author = _pick(matches, settings)
+    if (best_author is None or score < settings.get("match_score_threshold", 60)) and any(s not in matches for s in SOURCES):
+        # a higher threshold now needs a source that wasn't searched
+        return False
+    return best_author is None or works_key(best_author[0], _author_id(*best_author)) in raw.get("works", {})
+
+
+def _lookup_row(name: str, website: str, settings: Dict[str, Any], flight: SingleFlight, stages: ThreadPoolExecutor):
+    """Raw, settings-independent lookups for a row plus whether any failed.
+
+    Returns ``{"matches", "works", "company_summary"}``: the per-source author
+    matches, WORKS_LIMIT works/papers of the chosen author keyed by
+    ``works_key`` and the website summary.
+    """
+    # the website only depends on the row, so fetch it while authors are matched
+    domain = website_domain(website)
+    summary_future = None
+    if domain:
+        summary_future = stages.submit(flight.do, f"website:{domain}", lambda: _timed("website", summarize_website, website))
+
+    # a None from a client means the API call failed (as opposed to no results);
+    # such rows are only negative-cached briefly
+    matches, lookup_failed = _match_author(name, settings, flight, stages)
+    works = {}
+    _, best_author = _pick(matches, settings)
+    if best_author:
+        src, a = best_author
+        author_id = _author_id(src, a)
+        if src == "openalex":
+            found = flight.do(f"openalex_works:{author_id}", lambda: _timed("openalex_works", oa.get_author_works, author_id, per_page=WORKS_LIMIT))
+        else:
+            found = flight.do(f"semanticscholar_papers:{author_id}", lambda: _timed("semanticscholar_papers", ss.get_author_papers, author_id, limit=WORKS_LIMIT))
+        lookup_failed |= found is None
+        works[works_key(src, author_id)] = found or []
+
+    summary = summary_future.result() if summary_future is not None else ""
+    lookup_failed |= summary is None
+    return {"matches": matches, "works": works, "company_summary": summary or ""}, lookup_failed
+
+
+def _refresh_age(settings: Dict[str, Any]) -> Optional[float]:
+    """Age in seconds after which cached lookups are revalidated, or None outside refresh mode."""
+    if not settings.get("refresh"):
+        return None
+    return float(settings.get("refresh_after_days", REFRESH_AFTER_DAYS)) * DAY
+
+
+def _refresh_row(raw: Dict[str, Any], website: str, settings: Dict[str, Any], flight: SingleFlight, stages: ThreadPoolExecutor, max_age: float) -> Dict[str, Any]:
+    """``raw`` with the chosen author's works and the website summary revalidated.
+
+    Author matches are kept: the row's name didn't change. A lookup that
+    fails keeps its cached value.
+    """
+    domain = website_domain(website)
+    summary_future = None
+    if domain:
+        summary_future = stages.submit(flight.do, f"website_refresh:{domain}", lambda: _timed("website", summarize_website, website, max_age))
+
+    works = dict(raw.get("works", {}))
+    _, best_author = _pick(raw["matches"], settings)
+    if best_author:
+        src, a = best_author
+        author_id = _author_id(src, a)
+        if src == "openalex":
+            found = flight.do(f"openalex_works_refresh:{author_id}", lambda: _timed("openalex_works", oa.refresh_author_works, author_id, max_age, per_page=WORKS_LIMIT))
+        else:
+            found = flight.do(f"semanticscholar_papers_refresh:{author_id}", lambda: _timed("semanticscholar_papers", ss.refresh_author_papers, author_id, max_age, limit=WORKS_LIMIT))
+        if found is not None:
+            works[works_key(src, author_id)] = found
+
+    summary = summary_future.result() if summary_future is not None else None
+    return {**raw, "works": works, "company_summary": raw.get("company_summary", "") if summary is None else summary}
+
+
+def _finalize(name: str, company: str, raw: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Output columns from a raw record; cheap, so redone for every row and setting."""
+    best_score, best_author = _pick(raw["matches"], settings)
 
     top_title = None
     top_year = None
@@ -123,11 +355,10 @@ def enrich_row(row: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
 
     if best_author:
         src, a = best_author
+        works = (raw.get("works", {}).get(works_key(src, _author_id(src, a))) or [])[:settings.get("num_papers", 5)]
         if src == "openalex":
-            author_id = a.get("id")
             affs = ", ".join([x.get("display_name","") for x in a.get("x_concepts", []) if x]) if a.get("x_concepts") else ", ".join([aff.get("display_name","") for aff in a.get("institutions", [])])
             matched_info = f"OpenAlex | {a.get('display_name')} | {affs}"
-            works = oa.get_author_works(author_id, per_page=settings.get("num_papers", 5)) or []
             if works:
                 w = works[0]
                 top_title = w.get("title")
@@ -138,11 +369,9 @@ def enrich_row(row: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
                 debug_papers_found = True
             debug_author_matched = True
         else:
-            author_id = a.get("authorId") or a.get("id")
             matched_info = f"SemanticScholar | {a.get('name')}"
-            papers = ss.get_author_papers(author_id, limit=settings.get("num_papers", 5)) or []
-            if papers:
-                w = papers[0]
+            if works:
+                w = works[0]
                 top_title = w.get("title")
                 top_year = w.get("year")
                 topics = w.get("fieldsOfStudy") or []
@@ -151,16 +380,7 @@ def enrich_row(row: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
 
     confidence = confidence_label(best_score, threshold_high=85, threshold_med=65)
     hook = _gen_hook(name, top_title)
-
-    # New email-ready hooks
     hook_person = _generate_person_hook(name, top_title, top_year, topics)
-    hook_company = _generate_company_hook(company, company_summary)
-    if hook_person:
-        hook_final = hook_person
-    elif hook_company:
-        hook_final = hook_company
-    else:
-        hook_final = "I came across your team’s work in antibody R&D and wanted to reach out."
 
     # Person Work Line: only write when author matched with sufficient score
     person_work_line = ""
@@ -179,31 +399,20 @@ def enrich_row(row: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
             person_work_line = f"{name} works on {', '.join(parts)}."
             person_work_source = "papers"
 
-    # Company Summary Line: attempt to fetch meta description/title/h1 from website
-    company_summary = ""
-    company_summary_source = "none"
-    if website:
-        html = request_html_with_retries(website)
-        if html:
-            # try meta description, og:description, title, then first h1
-            meta = re.search(r'<meta[^>]+name=[\"\']description[\"\'][^>]*content=[\"\']([^\"\']+)[\"\']', html, flags=re.I)
-            if not meta:
-                meta = re.search(r'<meta[^>]+property=[\"\']og:description[\"\'][^>]*content=[\"\']([^\"\']+)[\"\']', html, flags=re.I)
-            if meta:
-                company_summary = unescape(meta.group(1).strip())
-                company_summary_source = "website"
-            else:
-                title = re.search(r'<title>([^<]+)</title>', html, flags=re.I)
-                if title:
-                    company_summary = unescape(title.group(1).strip())
-                    company_summary_source = "website"
-                else:
-                    h1 = re.search(r'<h1[^>]*>([^<]+)</h1>', html, flags=re.I)
-                    if h1:
-                        company_summary = unescape(h1.group(1).strip())
-                        company_summary_source = "website"
+    # Company Summary Line: meta description/title/h1 fetched from the website
+    company_summary = raw.get("company_summary") or ""
+    company_summary_source = "website" if company_summary else "none"
 
-    out = {
+    # New email-ready hooks
+    hook_company = _generate_company_hook(company, company_summary)
+    if hook_person:
+        hook_final = hook_person
+    elif hook_company:
+        hook_final = hook_company
+    else:
+        hook_final = "I came across your team’s work in antibody R&D and wanted to reach out."
+
+    return {
         "Personalization Hook": hook,
         "Hook_Person": hook_person,
         "Hook_Company": hook_company,
@@ -226,16 +435,288 @@ def enrich_row(row: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
         "Debug Papers Found": bool(debug_papers_found),
     }
 
-    disk_cache_set(cache_key, out)
-    return {**row, **out}
 
-def enrich_contacts(df, settings: Dict[str, Any]):
-    rows = []
+def error_row(row: Dict[str, Any], error: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """``row`` with an ``ERROR_COLUMN`` message and every output column left empty."""
+    out = {**row, **dict.fromkeys(_finalize("", "", {"matches": {}}, settings)), ERROR_COLUMN: error}
+    if _refresh_age(settings) is not None:
+        out[REFRESH_COLUMN] = None
+    return out
+
+
+def enrich_row(row: Dict[str, Any], settings: Dict[str, Any], flight: Optional[SingleFlight] = None, stages: Optional[ThreadPoolExecutor] = None) -> Dict[str, Any]:
+    """Enrich one contact row.
+
+    ``flight`` shares identical author and website lookups across the rows of
+    a job; without one, each call does its own lookups. The website summary
+    and the author searches run concurrently on ``stages`` (a pool separate
+    from the one running rows, so a row never waits on its own workers); a
+    small pool is made for the call when none is given.
+
+    The cache holds the row's raw lookups under a normalized key; threshold,
+    confidence and hook text are recomputed from them for each job's settings.
+    With ``settings["refresh"]`` a cached row's works and website older than
+    ``refresh_after_days`` are revalidated and ``REFRESH_COLUMN`` says
+    whether its output changed.
+    """
+    return _enrich_row(row, settings, flight, stages)[0]
+
+
+def _enrich_row(row: Dict[str, Any], settings: Dict[str, Any], flight: Optional[SingleFlight], stages: Optional[ThreadPoolExecutor]):
+    """``(enriched row, lookup_failed)``; see ``enrich_row``."""
+    flight = flight or SingleFlight()
+    name, company, website = _row_fields(row)
+
+    cache_key = _enrich_cache_key(name, company, website)
+    max_age = _refresh_age(settings)
+    # a refresh revalidates expired records too instead of redoing the row
+    entry = disk_cache_get_entry(cache_key, allow_expired=max_age is not None)
+    raw = entry[0] if entry is not None else None
+    covered = _covers(raw, settings)
+    if covered and max_age is None:
+        metrics.inc("rows_total", result="cached")
+        return {**row, **_finalize(name, company, raw, settings)}, False
+    own_stages = stages is None
+    if own_stages:
+        stages = ThreadPoolExecutor(max_workers=STAGES_PER_ROW, thread_name_prefix="stage")
+    try:
+        with metrics.timer("stage_seconds", stage="row"):
+            if covered:
+                fresh = _refresh_row(raw, website, settings, flight, stages, max_age)
+            else:
+                fresh, lookup_failed = _lookup_row(name, website, settings, flight, stages)
+    finally:
+        if own_stages:
+            stages.shutdown(wait=False)
+    out = _finalize(name, company, fresh, settings)
+    if covered:
+        status = "changed" if out != _finalize(name, company, raw, settings) else "unchanged"
+        metrics.inc("rows_total", result=status)
+        # rewritten even if unchanged, which resets its age and expiry
+        disk_cache_set(cache_key, fresh)
+        return {**row, **out, REFRESH_COLUMN: status}, False
+    metrics.inc("rows_total", result="partial" if lookup_failed else "enriched")
+    if not lookup_failed:
+        # a partial record would be replayed as a complete row; its lookups
+        # are cached individually (failures for FAILURE_TTL) instead
+        disk_cache_set(cache_key, fresh)
+    if max_age is not None:
+        out[REFRESH_COLUMN] = "new"
+    return {**row, **out}, lookup_failed
+
+def _run_row(idx: int, row: Dict[str, Any], settings: Dict[str, Any], flight: SingleFlight, journal: Optional[JobJournal], job_id: Optional[str], stages: Optional[ThreadPoolExecutor] = None) -> Dict[str, Any]:
+    lookup_failed = False
+    try:
+        enriched, lookup_failed = _enrich_row(row, settings, flight, stages)
+    except Exception as e:
+        metrics.inc("rows_total", result="error")
+        enriched = error_row(row, f"{type(e).__name__}: {e}", settings)
+    if journal is not None:
+        # keep the job going; a row that raised or whose lookups failed is
+        # journaled as failed and enriched again on resume
+        error = enriched.get(ERROR_COLUMN) or (LOOKUP_FAILED_ERROR if lookup_failed else None)
+        journal.record(job_id, idx, enriched, error=error)
+    # optional extra pacing per worker; API quotas are enforced by the rate limiter
+    delay = settings.get("per_row_delay", 0.0)
+    if delay:
+        time.sleep(delay)
+    return enriched
+
+
+def _blocks(rows: Iterable, size: int) -> Iterator[list]:
+    block = []
+    for row in rows:
+        block.append(row)
+        if len(block) >= size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def _prefetch_author_works(rows: list, settings: Dict[str, Any], flight: SingleFlight, pool: ThreadPoolExecutor):
+    """Pipeline stage: match authors for a block of rows, then fetch their
+    works/papers with batched requests so ``enrich_row`` finds them cached.
+
+    Searches run in parallel on the pool; Semantic Scholar is only searched
+    for names without a confident OpenAlex match, whatever ``search_mode``,
+    so pool threads don't queue on its rate limit for names already matched.
+    Matching is one vectorized ``best_matches`` call per source for the whole
+    block.
+    """
+    names = []
+    refresh = _refresh_age(settings) is not None
+    for row in rows:
+        name, company, website = _row_fields(row)
+        entry = disk_cache_get_entry(_enrich_cache_key(name, company, website), allow_expired=refresh) if name else None
+        if name and not _covers(entry[0] if entry is not None else None, settings):
+            names.append(name)
+    names = list(dict.fromkeys(names))
+    if not names:
+        return
+    threshold = settings.get("match_score_threshold", 60)
+    best = [_index_match(n, settings) for n in names]
+    pending = [i for i in range(len(names)) if best[i][1] is None or best[i][0] < threshold]
+
+    def submit(source, indices):
+        return {i: pool.submit(_search_authors, source, names[i], flight) for i in indices}
+
+    for source in SOURCES:
+        if not pending:
+            break
+        futures = submit(source, pending)
+        results = [futures[i].result() for i in pending]
+        with metrics.timer("stage_seconds", stage="match"):
+            matches = best_matches([names[i] for i in pending], [_candidate_names(source, r) for r in results])
+        for i, authors, (idx, score) in zip(pending, results, matches):
+            if score > best[i][0]:
+                best[i] = (score, (source, authors[idx]))
+        pending = [i for i in pending if best[i][1] is None or best[i][0] < threshold]
+
+    works_counts, semanticscholar_ids = {}, []
+    for _, best_author in best:
+        if best_author is None:
+            continue
+        src, a = best_author
+        if src == "semanticscholar":
+            semanticscholar_ids.append(_author_id(src, a))
+        elif isinstance(a.get("works_count"), int) and a["works_count"] <= oa.BATCH_PAGE_SIZE:
+            # larger or unknown works lists are fetched per row, in parallel
+            works_counts[_author_id(src, a)] = a["works_count"]
+    openalex_ids = list(works_counts)
+    num_papers = settings.get("num_papers", 5)
+    if len(openalex_ids) > 1:
+        _timed("openalex_works_batch", oa.get_works_for_authors, openalex_ids, per_page=num_papers, works_counts=works_counts)
+    if len(semanticscholar_ids) > 1:
+        _timed("semanticscholar_papers_batch", ss.get_papers_for_authors, semanticscholar_ids, limit=num_papers)
+
+
+def iter_enrich_rows(rows: Iterable[Dict[str, Any]], settings: Dict[str, Any], flight: Optional[SingleFlight] = None, journal: Optional[JobJournal] = None, job_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Enrich rows on a bounded worker pool, yielding results in input order.
+
+    At most ``2 * concurrency`` rows are in flight, so ``rows`` may be a lazy
+    iterator of any length. Closing the generator cancels rows not yet started.
+    Rows are read in blocks of ``lookup_batch_size``; each block's works and
+    papers are fetched in batched requests before its rows are enriched.
+    Pass a ``SingleFlight`` to read the job's deduplication stats afterwards.
+    With ``settings["metrics_file"]`` the process metrics are written there in
+    Prometheus text format when the run ends.
+
+    A row that raises is yielded with an ``ERROR_COLUMN`` message. With a
+    ``journal``, every row is recorded under ``job_id`` as it finishes, and
+    rows already done in the journal are replayed instead of enriched.
+    """
+    flight = flight or SingleFlight()
+    done = journal.done_indices(job_id) if journal is not None else set()
+    concurrency = max(1, int(settings.get("concurrency", DEFAULT_CONCURRENCY)))
+    limiter.configure(settings.get("rate_limits"))
+    sessions.configure(pool_size=concurrency)
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="enrich")
+    # lookups within a row; separate from ``pool`` so rows can wait on them
+    stages = ThreadPoolExecutor(max_workers=concurrency * STAGES_PER_ROW, thread_name_prefix="stage")
+    window = deque()
+    batch_size = int(settings.get("lookup_batch_size", DEFAULT_LOOKUP_BATCH_SIZE))
+    try:
+        for block in _blocks(enumerate(rows), max(1, batch_size)):
+            todo = [(i, row) for i, row in block if i not in done]
+            if batch_size > 1 and todo:
+                _timed("prefetch", _prefetch_author_works, [row for _, row in todo], settings, flight, pool)
+            for i, row in block:
+                if i in done:
+                    window.append(pool.submit(journal.output, job_id, i))
+                else:
+                    window.append(pool.submit(_run_row, i, row, settings, flight, journal, job_id, stages))
+                if len(window) >= concurrency * 2:
+                    yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        stages.shutdown(wait=False, cancel_futures=True)
+        disk_cache_flush()
+        if settings.get("metrics_file"):
+            metrics.write_prometheus(settings["metrics_file"])
+
+
+def enrich_contacts(df, settings: Dict[str, Any], progress_callback: Optional[Callable[[int, int], None]] = None, journal: Optional[JobJournal] = None, job_id: Optional[str] = None):
+    """Enrich the first ``max_rows`` rows of ``df``.
+
+    With a ``journal`` and ``job_id`` the run is checkpointed per row and a
+    repeated call with the same ``job_id`` resumes where the last one stopped.
+    The run's metrics (``metrics.delta``) are in ``attrs["metrics"]``.
+    """
     max_rows = min(len(df), settings.get("max_rows", 50))
-    for i in range(max_rows):
-        row = df.iloc[i].to_dict()
-        enriched = enrich_row(row, settings)
-        rows.append(enriched)
-        # light rate limiting
-        time.sleep(settings.get("per_row_delay", 0.5))
-    return pd.DataFrame(rows)
+    rows = df.head(max_rows).to_dict("records")
+    if journal is not None:
+        journal.start(job_id, max_rows, settings)
+    flight = SingleFlight()
+    before = metrics.snapshot()
+    results = []
+    for enriched in iter_enrich_rows(rows, settings, flight, journal=journal, job_id=job_id):
+        results.append(enriched)
+        if progress_callback:
+            progress_callback(len(results), max_rows)
+    out = pd.DataFrame(results)
+    out.attrs["lookup_stats"] = flight.stats()
+    out.attrs["metrics"] = delta(metrics.snapshot(), before)
+    log_summary(job_id or "", out.attrs["metrics"])
+    return out
+
+
+def enrich_csv(source, sink, settings: Dict[str, Any], chunksize: int = CSV_CHUNK_ROWS, transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None, progress_callback: Optional[Callable[[int, Optional[int]], None]] = None, journal: Optional[JobJournal] = None, job_id: Optional[str] = None, cancel: Optional[threading.Event] = None) -> int:
+    """Stream a contacts CSV through enrichment into ``sink`` chunk by chunk.
+
+    ``source`` is anything ``pd.read_csv`` accepts and ``sink`` a path or
+    writable text file. Only ``chunksize`` rows plus the in-flight window are
+    held in memory. ``transform`` maps each enriched chunk to the frame that
+    is written (e.g. ``utils.to_output_frame``). ``settings["max_rows"]``
+    limits the row count when set. Returns the number of rows written.
+    ``journal``/``job_id`` checkpoint and resume the run as in ``enrich_contacts``.
+    Setting ``cancel`` stops after the current row; rows done so far are kept.
+    """
+    rows = iter_csv_rows(source, chunksize)
+    max_rows = settings.get("max_rows")
+    if max_rows:
+        rows = islice(rows, max_rows)
+    if journal is not None:
+        journal.start(job_id, max_rows or 0, settings)
+    fh = open(sink, "w", encoding="utf-8", newline="") if isinstance(sink, str) else sink
+    written = 0
+    buf = []
+
+    columns = None
+
+    def write_block():
+        nonlocal written, columns
+        frame = pd.DataFrame(buf)
+        if transform:
+            frame = transform(frame)
+        # the header comes from the first chunk; later chunks follow its columns
+        if columns is None:
+            columns = list(frame.columns)
+        else:
+            frame = frame.reindex(columns=columns)
+        frame.to_csv(fh, index=False, header=written == 0)
+        fh.flush()
+        written += len(buf)
+        buf.clear()
+
+    enriched_rows = iter_enrich_rows(rows, settings, journal=journal, job_id=job_id)
+    try:
+        for enriched in enriched_rows:
+            if cancel is not None and cancel.is_set():
+                break
+            buf.append(enriched)
+            if progress_callback:
+                progress_callback(written + len(buf), max_rows or None)
+            if len(buf) >= chunksize:
+                write_block()
+        if buf:
+            write_block()
+        if journal is not None:
+            journal.start(job_id, written, settings)
+    finally:
+        enriched_rows.close()
+        if fh is not sink:
+            fh.close()
+    return written
@@ -0,0 +1,228 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .enrichment import iter_enrich_rows, enrich_csv
+from .journal import JobJournal
+from .singleflight import SingleFlight
+from .metrics import metrics, delta, log_summary
+from .workqueue import WorkQueue, enrich_with_workers
+
+DEFAULT_MAX_JOBS = 4
+# finished jobs (and their results) kept for polling before being dropped
+MAX_FINISHED_JOBS = 8
+FINISHED_JOB_TTL = 3600.0
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class Job:
+    """State of one background enrichment job, safe to read from any thread."""
+
+    def __init__(self, job_id: str, total: Optional[int], output_path: Optional[str] = None, owner: str = ""):
+        self.job_id = job_id
+        self.owner = owner
+        self.total = total
+        self.output_path = output_path
+        self.status = QUEUED
+        self.done = 0
+        self.error: Optional[str] = None
+        self.lookup_stats: Dict[str, Dict[str, int]] = {}
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._results: List[Dict[str, Any]] = []
+        self._metrics_start: Optional[Dict] = None
+        self._metrics_end: Optional[Dict] = None
+        self._cancel = threading.Event()
+        self._discarded = False
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, CANCELLED, FAILED)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def progress(self) -> float:
+        if self.finished and self.status == DONE:
+            return 1.0
+        return min(1.0, self.done / self.total) if self.total else 0.0
+
+    def results(self) -> pd.DataFrame:
+        """Rows enriched so far, in input order (in-memory jobs only)."""
+        with self._lock:
+            out = pd.DataFrame(list(self._results))
+        out.attrs["lookup_stats"] = self.lookup_stats
+        return out
+
+    def metrics(self) -> Dict:
+        """Metrics recorded while the job ran (see ``metrics.delta``).
+
+        Other jobs running at the same time share the process registry, so
+        their activity is included too.
+        """
+        if self._metrics_start is None:
+            return {"counters": [], "histograms": []}
+        return delta(self._metrics_end or metrics.snapshot(), self._metrics_start)
+
+    def _add(self, enriched: Dict[str, Any]):
+        with self._lock:
+            self._results.append(enriched)
+            self.done = len(self._results)
+
+
+def _remove_output(job: Job):
+    if job.output_path:
+        try:
+            os.remove(job.output_path)
+        except FileNotFoundError:
+            pass
+
+
+class JobRunner:
+    """Runs enrichment jobs on a small thread pool so callers (the Streamlit
+    script) can return immediately and poll ``Job`` state on later reruns.
+
+    Jobs are keyed by ``owner`` (e.g. a browser session) and ``job_id``;
+    submitting an id the owner still has running returns the running job.
+    With a journal, finished rows survive process restarts and a resubmitted
+    job resumes. Finished jobs are dropped after FINISHED_JOB_TTL or once more
+    than MAX_FINISHED_JOBS have finished, oldest first; this is checked
+    whenever a job is submitted, finishes or is looked up.
+    """
+
+    def __init__(self, max_jobs: int = DEFAULT_MAX_JOBS, journal: Optional[JobJournal] = None):
+        self.journal = journal
+        self._pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="job")
+        self._jobs: Dict[Tuple[str, str], Job] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str, owner: str = "") -> Optional[Job]:
+        # polling is what drops expired jobs (and their output files) when
+        # nothing new is submitted
+        self._evict()
+        with self._lock:
+            return self._jobs.get((owner, job_id))
+
+    def submit(self, job_id: str, df: pd.DataFrame, settings: Dict[str, Any], owner: str = "") -> Job:
+        """Enrich the first ``max_rows`` rows of ``df`` in the background."""
+        max_rows = min(len(df), settings.get("max_rows", 50))
+        rows = df.head(max_rows).to_dict("records")
+        return self._start(Job(job_id, max_rows, owner=owner), lambda job: self._run_rows(job, rows, settings))
+
+    def submit_queued(self, job_id: str, df: pd.DataFrame, settings: Dict[str, Any], workers: int, queue: Optional[WorkQueue] = None, owner: str = "") -> Job:
+        """Like ``submit`` but the rows are enriched by ``workers`` worker
+        processes through a ``workqueue.WorkQueue`` (default file if None)."""
+        max_rows = min(len(df), settings.get("max_rows", 50))
+        rows = df.head(max_rows).to_dict("records")
+        queue = queue or WorkQueue()
+
+        def run(job: Job):
+            # the queued job resumes if its owner resubmits the same rows;
+            # other owners get their own, so cancelling one leaves theirs alone
+            queue_job_id = f"{job.job_id}:{max_rows}" + (f":{owner}" if owner else "")
+            for enriched in enrich_with_workers(rows, settings, queue_job_id, workers=workers, queue=queue, cancel=job._cancel):
+                job._add(enriched)
+
+        return self._start(Job(job_id, max_rows, owner=owner), run)
+
+    def submit_csv(self, job_id: str, source, output_path: str, settings: Dict[str, Any], transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None, owner: str = "") -> Job:
+        """Stream ``source`` through ``enrichment.enrich_csv`` into ``output_path``."""
+        job = Job(job_id, settings.get("max_rows") or None, output_path=output_path, owner=owner)
+        return self._start(job, lambda job: self._run_csv(job, source, settings, transform))
+
+    def discard(self, job_id: str, owner: str = ""):
+        """Cancel a job and forget it, removing its output file (once its
+        worker has stopped writing, for an unfinished job)."""
+        with self._lock:
+            job = self._jobs.pop((owner, job_id), None)
+            if job is None:
+                return
+            job._discarded = True
+            finished = job.finished
+        job.cancel()
+        if finished:
+            _remove_output(job)
+
+    def _start(self, job: Job, run: Callable[[Job], None]) -> Job:
+        key = (job.owner, job.job_id)
+        with self._lock:
+            existing = self._jobs.get(key)
+            if existing is not None and not existing.finished:
+                return existing
+            if existing is not None:
+                existing._discarded = True
+            self._jobs[key] = job
+        if existing is not None:
+            _remove_output(existing)
+        self._evict()
+        self._pool.submit(self._execute, job, run)
+        return job
+
+    def _evict(self):
+        now = time.time()
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j.finished and j.finished_at), key=lambda j: j.finished_at, reverse=True)
+            evicted = [j for i, j in enumerate(finished) if i >= MAX_FINISHED_JOBS or now - j.finished_at > FINISHED_JOB_TTL]
+            for j in evicted:
+                del self._jobs[(j.owner, j.job_id)]
+                j._discarded = True
+        for j in evicted:
+            _remove_output(j)
+
+    def _execute(self, job: Job, run: Callable[[Job], None]):
+        job._metrics_start = metrics.snapshot()
+        job.status = RUNNING
+        try:
+            run(job)
+            job.status = CANCELLED if job._cancel.is_set() else DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        finally:
+            job._metrics_end = metrics.snapshot()
+            job.finished_at = time.time()
+            log_summary(job.job_id, job.metrics())
+            with self._lock:
+                discarded = job._discarded
+            if discarded:
+                _remove_output(job)
+            self._evict()
+
+    def _run_rows(self, job: Job, rows: List[Dict[str, Any]], settings: Dict[str, Any]):
+        if self.journal is not None:
+            self.journal.start(job.job_id, len(rows), settings)
+        flight = SingleFlight()
+        enriched_rows = iter_enrich_rows(rows, settings, flight, journal=self.journal, job_id=job.job_id)
+        try:
+            for enriched in enriched_rows:
+                if job._cancel.is_set():
+                    break
+                job._add(enriched)
+                job.lookup_stats = flight.stats()
+        finally:
+            enriched_rows.close()
+
+    def _run_csv(self, job: Job, source, settings: Dict[str, Any], transform):
+        def on_progress(done, total):
+            job.done = done
+
+        job.done = enrich_csv(
+            source,
+            job.output_path,
+            settings,
+            transform=transform,
+            progress_callback=on_progress,
+            journal=self.journal,
+            job_id=job.job_id,
+            cancel=job._cancel,
+        )
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, Optional, Set
+
+from .cache_utils import CACHE_DIR, DAY
+
+JOURNAL_FILE = "jobs.sqlite3"
+# settings that change a row's output; the rest (concurrency, rate limits,
+# max_rows) can differ between a run and its resume
+JOB_SETTINGS = ("num_papers", "match_score_threshold", "refresh")
+# journaled rows hold full outputs (contact PII); jobs untouched this long
+# are deleted when another job starts
+JOURNAL_RETENTION = 7 * DAY
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    total INTEGER NOT NULL,
+    settings TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_rows (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    output TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+
+def job_id_for(data: bytes, settings: Dict[str, Any]) -> str:
+    """Stable id for an input file and the settings that affect its output."""
+    h = hashlib.sha256(data)
+    h.update(json.dumps({k: settings.get(k) for k in JOB_SETTINGS}, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+class JobJournal:
+    """Durable per-row record of enrichment jobs in SQLite.
+
+    Rows are ``done`` or ``failed`` once recorded and ``pending`` until then.
+    Every record is committed immediately, so a crashed or abandoned run can
+    be resumed: done rows are replayed from the journal, failed and pending
+    rows are enriched again. Jobs idle for ``retention`` seconds are pruned.
+    """
+
+    def __init__(self, path: Optional[str] = None, retention: float = JOURNAL_RETENTION):
+        self.path = path or os.path.join(CACHE_DIR, JOURNAL_FILE)
+        self.retention = retention
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def start(self, job_id: str, total: int, settings: Dict[str, Any]) -> bool:
+        """Register a job; returns True if it already existed (a resume)."""
+        now = time.time()
+        self.prune(now - self.retention, keep=job_id)
+        conn = self._conn()
+        with conn:
+            existing = conn.execute("SELECT total FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if existing is None:
+                conn.execute(
+                    "INSERT INTO jobs (job_id, total, settings, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, total, json.dumps(settings, default=str), now, now),
+                )
+            elif total > existing[0]:
+                conn.execute("UPDATE jobs SET total = ?, updated_at = ? WHERE job_id = ?", (total, now, job_id))
+        return existing is not None
+
+    def record(self, job_id: str, idx: int, output: Dict[str, Any], error: Optional[str] = None):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_rows (job_id, idx, status, output, error, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, idx, "failed" if error else "done", json.dumps(output, default=str), error, time.time()),
+            )
+
+    def done_indices(self, job_id: str) -> Set[int]:
+        rows = self._conn().execute("SELECT idx FROM job_rows WHERE job_id = ? AND status = 'done'", (job_id,))
+        return {r[0] for r in rows}
+
+    def output(self, job_id: str, idx: int) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT output FROM job_rows WHERE job_id = ? AND idx = ?", (job_id, idx)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def status(self, job_id: str) -> Dict[str, int]:
+        conn = self._conn()
+        job = conn.execute("SELECT total FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if job is None:
+            return {}
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM job_rows WHERE job_id = ? GROUP BY status", (job_id,)).fetchall())
+        done, failed = counts.get("done", 0), counts.get("failed", 0)
+        return {"total": job[0], "done": done, "failed": failed, "pending": max(0, job[0] - done - failed)}
+
+    def prune(self, before: float, keep: Optional[str] = None):
+        """Delete jobs with no activity since ``before`` (except ``keep``)."""
+        conn = self._conn()
+        with conn:
+            stale = [r[0] for r in conn.execute(
+                "SELECT job_id FROM jobs WHERE updated_at < ? AND job_id IS NOT ? AND NOT EXISTS "
+                "(SELECT 1 FROM job_rows r WHERE r.job_id = jobs.job_id AND r.updated_at >= ?)",
+                (before, keep, before),
+            )]
+            for job_id in stale:
+                conn.execute("DELETE FROM job_rows WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def delete(self, job_id: str):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM job_rows WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("lead_enricher.metrics")
+
+# histogram upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class Metrics:
+    """Thread-safe counters and latency histograms keyed by name and labels.
+
+    ``snapshot()`` returns plain data; ``delta(after, before)`` turns two
+    snapshots into the activity of one job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = Histogram()
+            h.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self, prefix: str = ""):
+        with self._lock:
+            for d in (self._counters, self._histograms):
+                for key in [k for k in d if k[0].startswith(prefix)]:
+                    del d[key]
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        with self._lock:
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in self._counters.items()]
+            histograms = [
+                {"name": n, "labels": dict(l), "count": h.count, "sum": h.sum, "buckets": list(h.buckets), "counts": list(h.counts)}
+                for (n, l), h in self._histograms.items()
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self) -> str:
+        return snapshot_to_prometheus(self.snapshot())
+
+    def write_prometheus(self, path: str):
+        """Write the Prometheus text format, e.g. for node_exporter's textfile collector."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+def _key(entry: Dict) -> Tuple[str, Labels]:
+    return entry["name"], _labels(entry["labels"])
+
+
+def delta(after: Dict, before: Dict) -> Dict[str, List[Dict]]:
+    """Activity between two snapshots."""
+    prev_c = {_key(c): c["value"] for c in before.get("counters", [])}
+    prev_h = {_key(h): h for h in before.get("histograms", [])}
+    counters = []
+    for c in after.get("counters", []):
+        value = c["value"] - prev_c.get(_key(c), 0)
+        if value:
+            counters.append({**c, "value": value})
+    histograms = []
+    for h in after.get("histograms", []):
+        p = prev_h.get(_key(h))
+        count = h["count"] - (p["count"] if p else 0)
+        if count:
+            counts = [a - b for a, b in zip(h["counts"], p["counts"])] if p else h["counts"]
+            histograms.append({**h, "count": count, "sum": h["sum"] - (p["sum"] if p else 0), "counts": counts})
+    return {"counters": counters, "histograms": histograms}
+
+
+def _prom_labels(labels: Dict[str, str], extra: Optional[Dict[str, str]] = None) -> str:
+    items = {**labels, **(extra or {})}
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{str(v)}"'.replace("\n", " ") for k, v in sorted(items.items()))
+    return "{" + body + "}"
+
+
+def snapshot_to_prometheus(snap: Dict, prefix: str = "lead_enricher_") -> str:
+    lines = []
+    typed = set()
+    for c in sorted(snap.get("counters", []), key=lambda c: c["name"]):
+        name = prefix + c["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_prom_labels(c['labels'])} {c['value']:g}")
+    for h in sorted(snap.get("histograms", []), key=lambda h: h["name"]):
+        name = prefix + h["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip(list(h["buckets"]) + ["+Inf"], h["counts"]):
+            cumulative += count
+            le = bound if bound == "+Inf" else f"{bound:g}"
+            lines.append(f"{name}_bucket{_prom_labels(h['labels'], {'le': le})} {cumulative}")
+        lines.append(f"{name}_sum{_prom_labels(h['labels'])} {h['sum']:.6f}")
+        lines.append(f"{name}_count{_prom_labels(h['labels'])} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def summarize(snap: Dict) -> Dict[str, List[Dict]]:
+    """Tables for a job summary: stage timings, per-host HTTP and cache lookups."""
+    stages = []
+    for h in snap.get("histograms", []):
+        if h["name"] != "stage_seconds":
+            continue
+        hist = Histogram(tuple(h["buckets"]))
+        hist.counts, hist.count, hist.sum = list(h["counts"]), h["count"], h["sum"]
+        stages.append({
+            "stage": h["labels"].get("stage"),
+            "count": h["count"],
+            "total_s": round(h["sum"], 3),
+            "mean_ms": round(h["sum"] / h["count"] * 1000, 1) if h["count"] else 0.0,
+            "p95_ms<=": hist.quantile(0.95) * 1000,
+        })
+    hosts: Dict[str, Dict[str, float]] = {}
+    cache: Dict[str, Dict[str, float]] = {}
+    for c in snap.get("counters", []):
+        labels = c["labels"]
+        if c["name"].startswith("http_"):
+            row = hosts.setdefault(labels.get("host", ""), {"host": labels.get("host", ""), "requests": 0, "retries": 0, "rate_limited": 0, "errors": 0, "bytes": 0})
+            field = {"http_requests_total": "requests", "http_retries_total": "retries", "http_rate_limited_total": "rate_limited",
+                     "http_errors_total": "errors", "http_bytes_total": "bytes"}.get(c["name"])
+            if field:
+                row[field] += c["value"]
+        elif c["name"] == "cache_lookups_total":
+            ns = labels.get("namespace", "")
+            row = cache.setdefault(ns, {"namespace": ns, "memory_hits": 0, "disk_hits": 0, "misses": 0})
+            row[labels.get("result", "misses")] = row.get(labels.get("result", "misses"), 0) + c["value"]
+    return {"stages": sorted(stages, key=lambda s: -s["total_s"]), "hosts": list(hosts.values()), "cache": list(cache.values())}
+
+
+def log_summary(job_id: str, snap: Dict):
+    """Emit one structured JSON log line for a finished job."""
+    logger.info(json.dumps({"event": "job_metrics", "job_id": job_id, **summarize(snap)}))
+
+
+metrics = Metrics()
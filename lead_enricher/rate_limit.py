@@ -0,0 +1,142 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# requests per second; OpenAlex allows 10/s, Semantic Scholar ~1/s without a key
+DEFAULT_RATES = {
+    "api.openalex.org": 10.0,
+    "api.semanticscholar.org": 1.0,
+}
+DEFAULT_RATE = 5.0
+MIN_RATE = 0.1
+MAX_BACKOFF = 60.0
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = MAX_BACKOFF) -> float:
+    # exponential growth with full jitter
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """Thread-safe token bucket that adapts its rate to 429 responses.
+
+    Callers reserve a token and sleep for the returned wait outside the lock,
+    so the bucket works for threads and coroutines alike.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(burst) if burst else max(1.0, float(rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def ready(self) -> bool:
+        """Whether a reservation now would not have to wait."""
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            return tokens >= 1 and now >= self._blocked_until
+
+    def pause(self, seconds: float):
+        # block every caller and halve the rate until responses succeed again;
+        # the bucket restarts when the pause ends, so waiters resume spaced
+        # out at the new rate instead of all at once
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self._tokens = min(self._tokens, 1.0)
+            self._updated = self._blocked_until
+
+    def recover(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self.max_rate = self.rate = max(MIN_RATE, float(rate))
+            self.capacity = max(1.0, self.max_rate)
+
+
+class RateLimiter:
+    """Per-host token buckets shared by every worker in the process."""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, default_rate: float = DEFAULT_RATE):
+        self.rates = {**DEFAULT_RATES, **(rates or {})}
+        self.default_rate = default_rate
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = host_of(url)
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                b = self._buckets[host] = TokenBucket(self.rates.get(host, self.default_rate))
+            return b
+
+    def configure(self, rates: Optional[Dict[str, float]]):
+        if not rates:
+            return
+        with self._lock:
+            self.rates.update(rates)
+            for host, rate in rates.items():
+                if host in self._buckets:
+                    self._buckets[host].set_rate(rate)
+
+    def acquire(self, url: str):
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def ready(self, url: str) -> bool:
+        return self.bucket(url).ready()
+
+    async def acquire_async(self, url: str):
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_rate_limited(self, url: str, retry_after: float):
+        self.bucket(url).pause(retry_after)
+
+    def on_success(self, url: str):
+        self.bucket(url).recover()
+
+
+limiter = RateLimiter()
@@ -1,9 +1,77 @@
-from rapidfuzz import fuzz
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(name: str) -> str:
+    """Casefold, strip diacritics and punctuation, split initials, sort tokens.
+
+    "Müller, J.-P." and "jp muller" both become comparable token-sorted
+    strings, so matching can use a plain ratio on the normalized forms.
+    """
+    if not name:
+        return ""
+    s = unicodedata.normalize("NFKD", name)
+    s = "".join(c for c in s if not unicodedata.combining(c)).casefold()
+    s = _NON_WORD.sub(" ", s)
+    return " ".join(sorted(s.split()))
+
 
 def name_match_score(a: str, b: str) -> int:
     if not a or not b:
         return 0
-    return int(fuzz.token_sort_ratio(a, b))
+    return int(fuzz.ratio(normalize_name(a), normalize_name(b)))
+
+
+def match_scores(queries: Sequence[str], candidates: Sequence[str], workers: int = -1) -> np.ndarray:
+    """Score matrix (len(queries) x len(candidates)) of normalized name similarity."""
+    q = [normalize_name(n or "") for n in queries]
+    c = [normalize_name(n or "") for n in candidates]
+    scores = process.cdist(q, c, scorer=fuzz.ratio, dtype=np.int32, workers=workers)
+    # an empty name never matches
+    scores[[not n for n in q], :] = 0
+    scores[:, [not n for n in c]] = 0
+    return scores
+
+
+def best_matches(queries: Sequence[str], candidates: Sequence[Sequence[Optional[str]]], workers: int = -1) -> List[Tuple[int, int]]:
+    """Best candidate per query within that query's own candidate list.
+
+    ``candidates[i]`` are the names returned for ``queries[i]``. All pairs are
+    scored in one ``cdist`` call over the distinct names, then masked to each
+    row's own candidates. Returns ``(index into candidates[i], score)`` per
+    query, ``(-1, 0)`` when the row has no candidates. Ties go to the first
+    candidate.
+    """
+    if not queries:
+        return []
+    unique = list(dict.fromkeys(n or "" for row in candidates for n in row))
+    if not unique:
+        return [(-1, 0)] * len(queries)
+    position = {n: i for i, n in enumerate(unique)}
+    scores = match_scores(queries, unique, workers=workers)
+    width = max(len(row) for row in candidates)
+    # gather each row's candidate scores into a (queries x width) matrix, -1 as padding
+    cols = np.full((len(queries), width), -1, dtype=np.int64)
+    for i, row in enumerate(candidates):
+        cols[i, :len(row)] = [position[n or ""] for n in row]
+    rows = np.arange(len(queries))[:, None]
+    gathered = np.where(cols >= 0, scores[rows, np.maximum(cols, 0)], -1)
+    best = gathered.argmax(axis=1)
+    best_scores = gathered[np.arange(len(queries)), best]
+    return [(int(b), int(s)) if s >= 0 else (-1, 0) for b, s in zip(best, best_scores)]
+
+
+def best_match(query: str, candidates: Sequence[Optional[str]]) -> Tuple[int, int]:
+    return best_matches([query], [candidates], workers=1)[0]
+
 
 def confidence_label(score: int, threshold_high: int = 85, threshold_med: int = 65) -> str:
     if score >= threshold_high:
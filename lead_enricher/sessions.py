@@ -0,0 +1,75 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limit import host_of
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5.0, 10.0)
+HOST_TIMEOUTS = {
+    "api.openalex.org": (3.05, 15.0),
+    "api.semanticscholar.org": (3.05, 20.0),
+}
+# hosts that get a dedicated keep-alive session; everything else (company
+# websites) shares one session with a connection pool per host
+API_HOSTS = ("api.openalex.org", "api.semanticscholar.org")
+DEFAULT_POOL_SIZE = 16
+SESSION_HEADERS = {
+    "User-Agent": "lead-enricher/1.0",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+
+def _new_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(SESSION_HEADERS)
+    # retries are handled by apis.get_with_retries
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class SessionPool:
+    """Keep-alive sessions shared by all workers, one per API host."""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeouts: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.pool_size = pool_size
+        self.timeouts = {**HOST_TIMEOUTS, **(timeouts or {})}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, url: str) -> requests.Session:
+        host = host_of(url)
+        key = host if host in API_HOSTS else "*"
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = _new_session(self.pool_size)
+            return session
+
+    def timeout_for(self, url: str) -> Tuple[float, float]:
+        return self.timeouts.get(host_of(url), DEFAULT_TIMEOUT)
+
+    def configure(self, pool_size: Optional[int] = None, timeouts: Optional[Dict[str, Tuple[float, float]]] = None):
+        if timeouts:
+            self.timeouts.update(timeouts)
+        if pool_size and pool_size > self.pool_size:
+            # grow the pools so concurrent workers don't discard connections;
+            # existing sessions are dropped (not closed, requests may still be
+            # in flight on them) and rebuilt lazily
+            with self._lock:
+                self.pool_size = pool_size
+                self._sessions = {}
+
+    def close(self):
+        with self._lock:
+            old, self._sessions = self._sessions, {}
+        for session in old.values():
+            session.close()
+
+
+sessions = SessionPool()
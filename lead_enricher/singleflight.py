@@ -0,0 +1,53 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+
+class SingleFlight:
+    """Run each keyed lookup once per job and share the result.
+
+    Concurrent callers with the same key wait for the first caller's result;
+    later callers get the remembered result. Keys are ``"<kind>:<id>"`` and
+    stats are reported per kind. A lookup that raises or returns None (a
+    failed API call) is forgotten once its waiters have it, so later callers
+    go back to the cache, where failures only last ``FAILURE_TTL``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._stats = defaultdict(lambda: {"calls": 0, "saved": 0})
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        kind = key.split(":", 1)[0]
+        with self._lock:
+            fut = self._calls.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._calls[key] = Future()
+                self._stats[kind]["calls"] += 1
+            else:
+                self._stats[kind]["saved"] += 1
+        if not owner:
+            return fut.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._calls.pop(key, None)
+            fut.set_exception(e)
+            raise
+        if result is None:
+            with self._lock:
+                self._calls.pop(key, None)
+        fut.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {kind: dict(counts) for kind, counts in self._stats.items()}
+
+    def saved(self) -> int:
+        with self._lock:
+            return sum(c["saved"] for c in self._stats.values())
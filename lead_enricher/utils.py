@@ -1,5 +1,25 @@
 import pandas as pd
 from io import StringIO
+from typing import Any, Dict, Iterator
+
+# rows per chunk when streaming large CSVs
+CSV_CHUNK_ROWS = 1000
+
+# privacy-safe output: (output column, candidate input columns)
+OUTPUT_COLUMNS = [
+    ("First Name", ["First Name", "first_name", "firstName"]),
+    ("Last Name", ["Last Name", "last_name", "lastName"]),
+    ("Title", ["Title", "title"]),
+    ("Company", ["Company Name", "company", "company_name"]),
+    ("Email", ["Email", "email"]),
+    # LinkedIn: prefer person linkedin url
+    ("LinkedIn", ["Person Linkedin Url", "person_linkedin", "linkedin", "Person Linkedin"]),
+    ("Website", ["Website", "website"]),
+]
+HOOK_COLUMNS = ["Hook_Person", "Hook_Company", "Hook_Final"]
+# set in refresh mode: "new", "changed" or "unchanged" since the cached run
+REFRESH_COLUMN = "Refresh Status"
+
 
 def read_csv_bytes(uploaded) -> pd.DataFrame:
     # uploaded can be st.uploaded_file
@@ -9,3 +29,31 @@ def read_csv_bytes(uploaded) -> pd.DataFrame:
         # try decode
         s = uploaded.getvalue().decode("utf-8")
         return pd.read_csv(StringIO(s))
+
+
+def iter_csv_rows(source, chunksize: int = CSV_CHUNK_ROWS) -> Iterator[Dict[str, Any]]:
+    """Yield CSV rows as dicts, reading ``chunksize`` rows at a time.
+
+    Cells are kept as strings (empty cells become ""), so memory stays flat
+    regardless of file size.
+    """
+    with pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False) as reader:
+        for chunk in reader:
+            yield from chunk.to_dict("records")
+
+
+def to_output_frame(enriched: pd.DataFrame, generate_hooks: bool = True) -> pd.DataFrame:
+    """Project enriched rows onto the privacy-safe output columns."""
+    n = len(enriched)
+    out = pd.DataFrame(index=range(n))
+    for col, sources in OUTPUT_COLUMNS:
+        values = next((enriched[c].values for c in sources if c in enriched.columns), [None] * n)
+        out[col] = values
+    for col in HOOK_COLUMNS:
+        if generate_hooks and col in enriched.columns:
+            out[col] = enriched[col].values
+        else:
+            out[col] = [""] * n
+    if REFRESH_COLUMN in enriched.columns:
+        out[REFRESH_COLUMN] = enriched[REFRESH_COLUMN].values
+    return out
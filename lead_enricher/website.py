@@ -0,0 +1,178 @@
+import time
+import codecs
+import requests
+from html.parser import HTMLParser
+from typing import Any, Dict, Optional
+
+from .apis import get_with_retries, metric_host, wire_bytes
+from .cache_utils import disk_cache_get_entry, disk_cache_set, LOOKUP_FAILED, FAILURE_TTL, EMPTY_TTL
+from .cache_keys import website_domain, website_key
+from .metrics import metrics
+
+# most sites put what we need in <head>; never read more than this
+MAX_BYTES = 256 * 1024
+CHUNK_SIZE = 8 * 1024
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class _SummaryParser(HTMLParser):
+    """Collects meta description, og:description, <title> and the first <h1>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.description = ""
+        self.og_description = ""
+        self.title = ""
+        self.h1 = ""
+        self.head_closed = False
+        self._capture = None
+        self._buf = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            a = {k.lower(): (v or "") for k, v in attrs}
+            content = a.get("content", "").strip()
+            if a.get("name", "").lower() == "description" and not self.description:
+                self.description = content
+            elif a.get("property", "").lower() == "og:description" and not self.og_description:
+                self.og_description = content
+        elif tag in ("title", "h1") and not getattr(self, tag):
+            self._capture, self._buf = tag, []
+        elif tag == "body":
+            self.head_closed = True
+
+    def handle_endtag(self, tag):
+        if tag == self._capture:
+            setattr(self, tag, " ".join("".join(self._buf).split()))
+            self._capture = None
+        elif tag == "head":
+            self.head_closed = True
+
+    def handle_data(self, data):
+        if self._capture:
+            self._buf.append(data)
+
+    @property
+    def summary(self) -> str:
+        return self.description or self.og_description or self.title or self.h1
+
+    @property
+    def done(self) -> bool:
+        # stop as soon as nothing later in the page could beat what we have
+        if self.description:
+            return True
+        if self.head_closed and (self.og_description or self.title):
+            return True
+        return bool(self.h1)
+
+
+def _decoder(content_type: str):
+    charset = "utf-8"
+    for param in content_type.split(";")[1:]:
+        k, _, v = param.partition("=")
+        if k.strip().lower() == "charset" and v.strip():
+            charset = v.strip().strip('"\'')
+    try:
+        return codecs.getincrementaldecoder(charset)(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def fetch_website_page(url: str, max_bytes: int = MAX_BYTES, validators: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """``{"summary", "etag", "last_modified"}`` for a page.
+
+    The summary is the meta description, og:description, title or first h1.
+    Streams the body and stops once the summary is settled or ``max_bytes``
+    have been read; the summary is "" for non-HTML or summary-less pages.
+    With ``validators`` (an earlier result) the request is conditional and
+    ``{"not_modified": True}`` means it still holds. A page that can never
+    be fetched (4xx, unknown host, refused connection) has an empty summary;
+    None if the fetch failed otherwise.
+    """
+    if "://" not in url:
+        url = f"http://{url}"
+    headers = {"Accept": "text/html,application/xhtml+xml"}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    try:
+        resp = get_with_retries(url, headers=headers, stream=True, raise_definitive=True)
+    except requests.RequestException:
+        return {"summary": "", "etag": None, "last_modified": None}
+    if resp is None:
+        return None
+    with resp:
+        if resp.status_code == 304:
+            return {"not_modified": True}
+        page = {"summary": "", "etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+        content_type = resp.headers.get("Content-Type", "")
+        if content_type and content_type.split(";")[0].strip().lower() not in HTML_TYPES:
+            return page
+        parser = _SummaryParser()
+        decoder = _decoder(content_type)
+        read = 0
+        try:
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                read += len(chunk)
+                parser.feed(decoder.decode(chunk))
+                if parser.done or read >= max_bytes:
+                    break
+        except requests.RequestException:
+            # connection dropped mid-body: keep what was parsed, but without
+            # validators so a later revalidation fetches the page in full
+            metrics.inc("http_errors_total", host=metric_host(url))
+            if not parser.summary:
+                return None
+            page["etag"] = page["last_modified"] = None
+        finally:
+            metrics.inc("http_bytes_total", wire_bytes(resp, read), host=metric_host(url))
+        page["summary"] = parser.summary
+        return page
+
+
+def fetch_website_summary(url: str, max_bytes: int = MAX_BYTES) -> Optional[str]:
+    """Summary of a page (see ``fetch_website_page``); None if the fetch failed."""
+    page = fetch_website_page(url, max_bytes)
+    return None if page is None else page["summary"]
+
+
+def _store(key: str, page: Optional[Dict[str, Any]]):
+    if page is None:
+        disk_cache_set(key, LOOKUP_FAILED, ttl=FAILURE_TTL)
+    else:
+        disk_cache_set(key, page, ttl=None if page["summary"] else EMPTY_TTL)
+
+
+def summarize_website(website: str, max_age: Optional[float] = None) -> Optional[str]:
+    """Cached website summary, keyed by domain.
+
+    With ``max_age`` (seconds) the cached page is used by age, even past its
+    expiry, and one older than ``max_age`` is revalidated with
+    If-None-Match/If-Modified-Since; a 304 keeps it and resets its age.
+    If revalidation fails the cached summary is returned.
+    """
+    if not website_domain(website):
+        return ""
+    key = website_key(website)
+    entry = disk_cache_get_entry(key, allow_expired=max_age is not None)
+    if entry is None:
+        page = fetch_website_page(website)
+        _store(key, page)
+        return None if page is None else page["summary"]
+    value, created_at = entry
+    if value == LOOKUP_FAILED:
+        return None
+    # entries written before validators were kept are plain summaries
+    cached = value if isinstance(value, dict) else {"summary": value}
+    if max_age is None or time.time() - created_at < max_age:
+        return cached["summary"]
+    page = fetch_website_page(website, validators=cached)
+    if page is None:
+        metrics.inc("revalidations_total", namespace="website", result="error")
+        return cached["summary"]
+    if page.get("not_modified"):
+        page = cached
+    metrics.inc("revalidations_total", namespace="website", result="changed" if page["summary"] != cached["summary"] else "unchanged")
+    _store(key, page)
+    return page["summary"]
@@ -0,0 +1,433 @@
+"""Work queue for enriching one job with several worker processes.
+
+Jobs, row batches ("tasks") and per-row results live in one SQLite file; no
+broker is needed. Workers claim a task with a lease, keep it alive with
+heartbeats while ``iter_enrich_rows`` runs, and write the rows back. A task
+whose lease runs out (its worker died or hung) is handed to the next worker
+that asks. The coordinator reads results back in input order.
+
+Start workers on this machine, or on any host that sees the same files::
+
+    python -m lead_enricher.workqueue worker --db queue.sqlite3 --rate-share 4
+
+SQLite's WAL mode needs shared memory, so for a database on a network
+filesystem pass ``--no-wal`` to every process.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .cache_utils import CACHE_DIR, configure_cache, get_cache
+from .enrichment import iter_enrich_rows, error_row, ERROR_COLUMN
+from .rate_limit import DEFAULT_RATES, MIN_RATE
+from .singleflight import SingleFlight
+
+QUEUE_FILE = "queue.sqlite3"
+DEFAULT_TASK_ROWS = 50
+DEFAULT_LEASE_SECONDS = 60.0
+# a task whose worker was lost this many times is failed instead of retried
+MAX_ATTEMPTS = 3
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_jobs (
+    job_id TEXT PRIMARY KEY,
+    total INTEGER NOT NULL,
+    settings TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS queue_tasks (
+    job_id TEXT NOT NULL,
+    task_no INTEGER NOT NULL,
+    start_idx INTEGER NOT NULL,
+    rows TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, task_no)
+);
+CREATE INDEX IF NOT EXISTS queue_tasks_status ON queue_tasks (status, lease_expires);
+CREATE TABLE IF NOT EXISTS queue_results (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    output TEXT NOT NULL,
+    error TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Task:
+    def __init__(self, job_id: str, task_no: int, start_idx: int, rows: List[Dict[str, Any]], settings: Dict[str, Any], worker: str):
+        self.job_id = job_id
+        self.task_no = task_no
+        self.start_idx = start_idx
+        self.rows = rows
+        self.settings = settings
+        self.worker = worker
+
+
+class WorkQueue:
+    """Jobs split into leased row batches, stored in SQLite (see module docstring)."""
+
+    def __init__(self, path: Optional[str] = None, wal: bool = True):
+        self.path = path or os.path.join(CACHE_DIR, QUEUE_FILE)
+        self.wal = wal
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit; transactions are explicit so claims can take the write lock up front
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute(f"PRAGMA journal_mode={'WAL' if self.wal else 'DELETE'}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def submit(self, job_id: str, rows: Iterable[Dict[str, Any]], settings: Dict[str, Any], task_rows: int = DEFAULT_TASK_ROWS) -> bool:
+        """Queue ``rows`` in batches of ``task_rows``; returns False if the job
+        was already queued (its finished rows are kept and it carries on)."""
+        rows = list(rows)
+        task_rows = max(1, task_rows)
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone():
+                conn.execute("UPDATE queue_tasks SET status = ? WHERE job_id = ? AND status = ?", (PENDING, job_id, CANCELLED))
+                return False
+            conn.execute(
+                "INSERT INTO queue_jobs (job_id, total, settings, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, len(rows), json.dumps(settings, default=str), time.time()),
+            )
+            conn.executemany(
+                "INSERT INTO queue_tasks (job_id, task_no, start_idx, rows, status) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (job_id, n, start, json.dumps(rows[start:start + task_rows], default=str), PENDING)
+                    for n, start in enumerate(range(0, len(rows), task_rows))
+                ],
+            )
+        return True
+
+    def claim(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Task]:
+        """Lease the oldest pending (or expired) task to ``worker``, or None."""
+        now = time.time()
+        with self._write() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT t.job_id, t.task_no, t.start_idx, t.rows, t.attempts, j.settings FROM queue_tasks t "
+                    "JOIN queue_jobs j ON j.job_id = t.job_id "
+                    "WHERE t.status = ? OR (t.status = ? AND t.lease_expires < ?) "
+                    "ORDER BY j.created_at, t.task_no LIMIT 1",
+                    (PENDING, LEASED, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                job_id, task_no, start_idx, rows, attempts, settings = row
+                if attempts >= MAX_ATTEMPTS:
+                    self._fail_task(conn, job_id, task_no, start_idx, json.loads(rows), json.loads(settings), f"task abandoned by {attempts} workers")
+                    continue
+                conn.execute(
+                    "UPDATE queue_tasks SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE job_id = ? AND task_no = ?",
+                    (LEASED, worker, now + lease_seconds, job_id, task_no),
+                )
+                return Task(job_id, task_no, start_idx, json.loads(rows), json.loads(settings), worker)
+
+    def _fail_task(self, conn: sqlite3.Connection, job_id: str, task_no: int, start_idx: int, rows: List[Dict[str, Any]], settings: Dict[str, Any], error: str):
+        conn.executemany(
+            "INSERT OR IGNORE INTO queue_results (job_id, idx, output, error) VALUES (?, ?, ?, ?)",
+            [(job_id, start_idx + i, json.dumps(error_row(row, error, settings), default=str), error) for i, row in enumerate(rows)],
+        )
+        conn.execute("UPDATE queue_tasks SET status = ?, worker = NULL WHERE job_id = ? AND task_no = ?", (FAILED, job_id, task_no))
+
+    def claimable(self, job_id: Optional[str] = None) -> int:
+        """Number of pending or expired tasks (of ``job_id``, or of any job)."""
+        sql = "SELECT COUNT(*) FROM queue_tasks WHERE (status = ? OR (status = ? AND lease_expires < ?))"
+        params: list = [PENDING, LEASED, time.time()]
+        if job_id is not None:
+            sql += " AND job_id = ?"
+            params.append(job_id)
+        return self._conn().execute(sql, params).fetchone()[0]
+
+    def heartbeat(self, task: Task, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend the lease; False if the task was reassigned or cancelled."""
+        with self._write() as conn:
+            cur = conn.execute(
+                "UPDATE queue_tasks SET lease_expires = ? WHERE job_id = ? AND task_no = ? AND status = ? AND worker = ?",
+                (time.time() + lease_seconds, task.job_id, task.task_no, LEASED, task.worker),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, task: Task, outputs: List[Dict[str, Any]]):
+        # a worker that lost its lease may still finish; results are the same rows either way
+        with self._write() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO queue_results (job_id, idx, output, error) VALUES (?, ?, ?, ?)",
+                [
+                    (task.job_id, task.start_idx + i, json.dumps(out, default=str), out.get(ERROR_COLUMN))
+                    for i, out in enumerate(outputs)
+                ],
+            )
+            conn.execute(
+                "UPDATE queue_tasks SET status = ?, worker = NULL, lease_expires = NULL WHERE job_id = ? AND task_no = ? AND status != ?",
+                (DONE, task.job_id, task.task_no, CANCELLED),
+            )
+
+    def release(self, task: Task):
+        """Give a task back without counting it against the worker."""
+        with self._write() as conn:
+            conn.execute(
+                "UPDATE queue_tasks SET status = ?, worker = NULL, lease_expires = NULL, attempts = MAX(0, attempts - 1) "
+                "WHERE job_id = ? AND task_no = ? AND status = ? AND worker = ?",
+                (PENDING, task.job_id, task.task_no, LEASED, task.worker),
+            )
+
+    def cancel(self, job_id: str):
+        """Stop handing out the job's tasks; leased ones finish or expire."""
+        with self._write() as conn:
+            conn.execute("UPDATE queue_tasks SET status = ? WHERE job_id = ? AND status IN (?, ?)", (CANCELLED, job_id, PENDING, LEASED))
+
+    def status(self, job_id: str) -> Dict[str, int]:
+        conn = self._conn()
+        job = conn.execute("SELECT total FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if job is None:
+            return {}
+        out = {"total": job[0]}
+        out.update(dict(conn.execute("SELECT status, COUNT(*) FROM queue_tasks WHERE job_id = ? GROUP BY status", (job_id,)).fetchall()))
+        out["rows_done"] = conn.execute("SELECT COUNT(*) FROM queue_results WHERE job_id = ?", (job_id,)).fetchone()[0]
+        out["rows_failed"] = conn.execute("SELECT COUNT(*) FROM queue_results WHERE job_id = ? AND error IS NOT NULL", (job_id,)).fetchone()[0]
+        return out
+
+    def results(self, job_id: str, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """Consecutive finished rows from index ``start``, in input order."""
+        rows = self._conn().execute("SELECT idx, output FROM queue_results WHERE job_id = ? AND idx >= ? ORDER BY idx", (job_id, start))
+        expected = start
+        for idx, output in rows:
+            if idx != expected:
+                break
+            yield json.loads(output)
+            expected += 1
+
+    def delete(self, job_id: str):
+        with self._write() as conn:
+            for table in ("queue_results", "queue_tasks", "queue_jobs"):
+                conn.execute(f"DELETE FROM {table} WHERE job_id = ?", (job_id,))
+
+
+def _shared_rates(settings: Dict[str, Any], share: int) -> Dict[str, Any]:
+    # each of ``share`` workers gets an equal part of the job's per-host rates
+    if share <= 1:
+        return settings
+    rates = {**DEFAULT_RATES, **(settings.get("rate_limits") or {})}
+    return {**settings, "rate_limits": {host: max(MIN_RATE, rate / share) for host, rate in rates.items()}}
+
+
+def _process(queue: WorkQueue, task: Task, lease_seconds: float, rate_share: int) -> bool:
+    """Enrich a task's rows while heartbeating; False if the lease was lost."""
+    lost = threading.Event()
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(lease_seconds / 3):
+            if not queue.heartbeat(task, lease_seconds):
+                lost.set()
+                return
+
+    beater = threading.Thread(target=beat, daemon=True)
+    beater.start()
+    outputs = []
+    rows = iter_enrich_rows(task.rows, _shared_rates(task.settings, rate_share), SingleFlight())
+    try:
+        for out in rows:
+            if lost.is_set():
+                return False
+            outputs.append(out)
+    finally:
+        rows.close()
+        stop.set()
+    queue.complete(task, outputs)
+    return True
+
+
+def run_worker(queue: WorkQueue, worker: Optional[str] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_interval: float = 1.0,
+               exit_when_idle: bool = False, rate_share: int = 1, stop: Optional[threading.Event] = None) -> int:
+    """Claim and process tasks until stopped (or the queue is empty with
+    ``exit_when_idle``); returns the number of tasks completed."""
+    worker = worker or default_worker_id()
+    stop = stop or threading.Event()
+    completed = 0
+    while not stop.is_set():
+        task = queue.claim(worker, lease_seconds)
+        if task is None:
+            if exit_when_idle:
+                break
+            stop.wait(poll_interval)
+            continue
+        try:
+            completed += _process(queue, task, lease_seconds, rate_share)
+        except Exception:
+            queue.release(task)
+            raise
+    return completed
+
+
+class LocalWorkers:
+    """Worker subprocesses on this machine for one queue file.
+
+    ``ensure_running`` restarts workers that crashed, up to ``max_restarts``
+    times in total. A worker that exited cleanly because it had nothing to
+    claim is only started again once a task can be claimed, and isn't counted.
+    """
+
+    def __init__(self, queue: WorkQueue, count: int, lease_seconds: float = DEFAULT_LEASE_SECONDS, max_restarts: Optional[int] = None):
+        self.queue = queue
+        self.count = count
+        self.lease_seconds = lease_seconds
+        self.max_restarts = 3 * count if max_restarts is None else max_restarts
+        self.restarts = 0
+        self.procs: List[subprocess.Popen] = []
+
+    def _command(self) -> List[str]:
+        cmd = [
+            sys.executable, "-m", "lead_enricher.workqueue", "worker",
+            "--db", self.queue.path,
+            "--cache", get_cache().path,
+            "--lease", str(self.lease_seconds),
+            "--rate-share", str(self.count),
+            "--exit-when-idle",
+        ]
+        return cmd if self.queue.wal else cmd + ["--no-wal"]
+
+    def start(self) -> "LocalWorkers":
+        self.procs = [subprocess.Popen(self._command()) for _ in range(self.count)]
+        return self
+
+    def ensure_running(self):
+        claimable = None
+        for i, proc in enumerate(self.procs):
+            if proc.poll() is None:
+                continue
+            if proc.returncode == 0:
+                if claimable is None:
+                    claimable = self.queue.claimable()
+                if not claimable:
+                    continue
+                claimable -= 1
+            else:
+                if self.restarts >= self.max_restarts:
+                    raise RuntimeError(f"queue workers keep exiting (last exit code {proc.returncode})")
+                self.restarts += 1
+            self.procs[i] = subprocess.Popen(self._command())
+
+    def stop(self):
+        for proc in self.procs:
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in self.procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def iter_queue_results(queue: WorkQueue, job_id: str, poll_interval: float = 0.5, workers: Optional[LocalWorkers] = None,
+                       cancel: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """Coordinator: yield a queued job's rows in input order as workers finish them.
+
+    With ``workers``, exited local workers are restarted while rows remain.
+    Setting ``cancel`` cancels the job's remaining tasks and stops.
+    """
+    total = queue.status(job_id).get("total", 0)
+    done = 0
+    while done < total:
+        for out in queue.results(job_id, done):
+            yield out
+            done += 1
+        if done >= total:
+            break
+        if cancel is not None and cancel.wait(poll_interval):
+            queue.cancel(job_id)
+            return
+        if cancel is None:
+            time.sleep(poll_interval)
+        if workers is not None:
+            workers.ensure_running()
+
+
+def enrich_with_workers(rows: Iterable[Dict[str, Any]], settings: Dict[str, Any], job_id: str, workers: int = 2, queue: Optional[WorkQueue] = None,
+                        task_rows: int = DEFAULT_TASK_ROWS, cancel: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """Enrich ``rows`` with ``workers`` local worker processes (0 relies on
+    workers started elsewhere), yielding results in input order."""
+    queue = queue or WorkQueue()
+    queue.submit(job_id, rows, settings, task_rows=task_rows)
+    # no more workers than batches left; one stays to pick up expired leases
+    workers = min(workers, max(1, queue.claimable(job_id)))
+    local = LocalWorkers(queue, workers).start() if workers > 0 else None
+    try:
+        yield from iter_queue_results(queue, job_id, workers=local, cancel=cancel)
+    finally:
+        if local is not None:
+            local.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m lead_enricher.workqueue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="claim and enrich queued row batches")
+    worker.add_argument("--db", default=None, help="queue database (default: the cache directory)")
+    worker.add_argument("--cache", default=None, help="lookup cache file to use")
+    worker.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="seconds a claimed task stays assigned without a heartbeat")
+    worker.add_argument("--poll", type=float, default=1.0)
+    worker.add_argument("--rate-share", type=int, default=1, help="number of workers sharing the API rate limits")
+    worker.add_argument("--exit-when-idle", action="store_true")
+    worker.add_argument("--id", default=None, help="worker id (default host:pid)")
+    worker.add_argument("--no-wal", action="store_true", help="rollback journal instead of WAL (network filesystems)")
+    status = sub.add_parser("status", help="show a job's task and row counts")
+    status.add_argument("job_id")
+    status.add_argument("--db", default=None)
+    status.add_argument("--no-wal", action="store_true")
+    args = parser.parse_args(argv)
+
+    queue = WorkQueue(args.db, wal=not args.no_wal)
+    if args.command == "status":
+        print(json.dumps(queue.status(args.job_id), indent=2))
+        return 0
+    if args.cache:
+        configure_cache(args.cache)
+    n = run_worker(queue, worker=args.id, lease_seconds=args.lease, poll_interval=args.poll,
+                   exit_when_idle=args.exit_when_idle, rate_share=max(1, args.rate_share))
+    print(f"completed {n} tasks", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())